@@ -0,0 +1,260 @@
+"""Lazy, bounded-memory reader for the raw tweet archive (data/raw/tweets_*.csv).
+
+Every day file gets a binary sidecar index under data/raw/.index holding one
+fixed-size entry per record: byte offset, length, tweet date and hashes of
+the username and trend. Queries memory-map those indexes, pick the matching
+entries with numpy and then seek straight to the matching records, so a
+query over one week reads that week's bytes and nothing else. Results come
+back as typed DataFrame batches of a fixed size. The raw files are
+append-only, so indexes are extended from where they stopped rather than
+rebuilt.
+
+    for batch in TweetArchive().scan(start='2025-05-01', end='2025-05-08', trends=['Onana']):
+        ...
+
+    python Analysis/archive.py [--start 2025-05-01] [--end 2025-05-08] [--trend Onana] [--user NFL]
+"""
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from normalize import normalize_tweets  # noqa: E402
+from seen_index import hash64  # noqa: E402
+from storage import TWEET_COLUMNS  # noqa: E402
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', '<u4'), ('date', '<i8'), ('user', '<u8'), ('trend', '<u8')])
+NO_DATE = np.iinfo(np.int64).min
+
+
+def to_epoch(value):
+    """Epoch seconds of a date/datetime/ISO string (naive values are UTC), or None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    stamp = stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp
+    return int(stamp.timestamp())
+
+
+def _parse_date(text):
+    try:
+        return int(datetime.fromisoformat(text.replace('Z', '+00:00')).astimezone(timezone.utc).timestamp())
+    except (AttributeError, ValueError):
+        return NO_DATE
+
+
+class DayIndex:
+    """Offset index of one raw CSV file: entries in name.idx, header and stats in name.json"""
+
+    def __init__(self, csv_path, index_dir):
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        self.csv_path = csv_path
+        self.index_path = os.path.join(index_dir, name + '.idx')
+        self.meta_path = os.path.join(index_dir, name + '.json')
+        self.meta = {'indexed': 0, 'header': None, 'min_date': None, 'max_date': None}
+        if os.path.exists(self.meta_path) and os.path.exists(self.index_path):
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+
+    def refresh(self):
+        """Index records appended since the last refresh; returns how many were added"""
+        size = os.path.getsize(self.csv_path)
+        if size < self.meta['indexed']:
+            # The file was rewritten rather than appended to, so start over
+            self.meta = {'indexed': 0, 'header': None, 'min_date': None, 'max_date': None}
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+        if size == self.meta['indexed']:
+            return 0
+
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self.meta['indexed'])
+            line_offsets = [self.meta['indexed']]
+            line_quotes = [0]  # Running count of '"' bytes, parallel to line_offsets
+            last_line = [b'\n']
+
+            def lines():
+                for raw in f:
+                    line_offsets.append(line_offsets[-1] + len(raw))
+                    line_quotes.append(line_quotes[-1] + raw.count(b'"'))
+                    last_line[0] = raw
+                    yield raw.decode('utf-8')
+
+            reader = csv.reader(lines())
+            if self.meta['header'] is None:
+                self.meta['header'] = next(reader, None) or []
+            header = self.meta['header']
+            date_col = header.index('date') if 'date' in header else None
+            user_col = header.index('username') if 'username' in header else None
+            trend_col = header.index('trend') if 'trend' in header else None
+
+            entries = []
+            line = last_start = reader.line_num
+            for row in reader:
+                start, end = line_offsets[line], line_offsets[reader.line_num]
+                if not row:
+                    line = reader.line_num
+                    continue
+                last_start, line = line, reader.line_num
+                entries.append((
+                    start, end - start,
+                    _parse_date(row[date_col]) if date_col is not None and date_col < len(row) else NO_DATE,
+                    hash64(row[user_col] if user_col is not None and user_col < len(row) else ''),
+                    hash64(row[trend_col] if trend_col is not None and trend_col < len(row) else ''),
+                ))
+            indexed = line_offsets[line]
+            # A row still being written may lack its trailing newline or, when it is cut inside a
+            # multi-line quoted field, its closing quote (complete records have an even number of
+            # quote bytes); leave it for the next refresh
+            torn = (line_quotes[line] - line_quotes[last_start]) % 2 if entries else 0
+            if entries and (torn or not last_line[0].endswith(b'\n')):
+                indexed = entries.pop()[0]
+
+        entries = np.array(entries, dtype=INDEX_DTYPE)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with open(self.index_path, 'ab') as f:
+            entries.tofile(f)
+        dates = entries['date'][entries['date'] != NO_DATE]
+        if len(dates):
+            self.meta['min_date'] = min(int(dates.min()), self.meta['min_date'] or int(dates.min()))
+            self.meta['max_date'] = max(int(dates.max()), self.meta['max_date'] or int(dates.max()))
+        self.meta['indexed'] = indexed
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+        return len(entries)
+
+    def entries(self):
+        """The index as a read-only memory-mapped structured array"""
+        if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(self.index_path, dtype=INDEX_DTYPE, mode='r')
+
+    def overlaps(self, start, end):
+        """False if no dated record of this file can fall in [start, end)"""
+        if self.meta['min_date'] is None:
+            return True
+        return (start is None or self.meta['max_date'] >= start) and (end is None or self.meta['min_date'] < end)
+
+
+class TweetArchive:
+    """Query the raw CSV archive through per-file offset indexes"""
+
+    def __init__(self, raw_dir="data/raw", index_dir=None):
+        self.raw_dir = raw_dir
+        self.index_dir = index_dir or os.path.join(raw_dir, '.index')
+
+    def days(self):
+        return [DayIndex(path, self.index_dir) for path in sorted(glob.glob(os.path.join(self.raw_dir, "tweets_*.csv")))]
+
+    def refresh(self):
+        """Bring every file's index up to date; returns the number of newly indexed records"""
+        return sum(day.refresh() for day in self.days())
+
+    def scan(self, start=None, end=None, usernames=None, trends=None, batch_size=10000, typed=True):
+        """Yield DataFrames of batch_size matching tweets (the last one may be smaller).
+
+        start/end bound the tweet date (start inclusive, end exclusive) and take
+        dates, ISO strings or epoch seconds. usernames and trends are exact-match
+        collections. Batches are normalized with normalize_tweets unless typed
+        is False, in which case they hold the raw strings.
+        """
+        start, end = to_epoch(start), to_epoch(end)
+        user_hashes = None if usernames is None else np.array([hash64(u) for u in usernames], dtype=np.uint64)
+        trend_hashes = None if trends is None else np.array([hash64(t) for t in trends], dtype=np.uint64)
+
+        pending = []
+        for day in self.days():
+            day.refresh()
+            if not day.overlaps(start, end):
+                continue
+            entries = day.entries()
+            mask = np.ones(len(entries), dtype=bool)
+            if start is not None:
+                mask &= entries['date'] >= start
+            if end is not None:
+                mask &= (entries['date'] < end) & (entries['date'] != NO_DATE)
+            if user_hashes is not None:
+                mask &= np.isin(entries['user'], user_hashes)
+            if trend_hashes is not None:
+                mask &= np.isin(entries['trend'], trend_hashes)
+            selected = np.flatnonzero(mask)
+
+            for chunk in range(0, len(selected), batch_size):
+                rows = self._read_rows(day, entries[selected[chunk:chunk + batch_size]])
+                # Hashes can collide, so check the parsed values as well
+                if usernames is not None:
+                    rows = rows[rows['username'].isin(list(usernames))]
+                if trends is not None:
+                    rows = rows[rows['trend'].isin(list(trends))]
+                pending.append(rows)
+                while sum(len(r) for r in pending) >= batch_size:
+                    batch, pending = self._take(pending, batch_size)
+                    yield normalize_tweets(batch) if typed else batch
+        if pending and sum(len(r) for r in pending):
+            batch, _ = self._take(pending, sum(len(r) for r in pending))
+            yield normalize_tweets(batch) if typed else batch
+
+    @staticmethod
+    def _take(frames, n):
+        """Split the first n rows off a list of frames"""
+        combined = pd.concat(frames, ignore_index=True)
+        return combined.iloc[:n].reset_index(drop=True), [combined.iloc[n:]]
+
+    @staticmethod
+    def _read_rows(day, entries):
+        """Read the given index entries' records, coalescing adjacent ones into single reads"""
+        chunks = []
+        with open(day.csv_path, 'rb') as f:
+            run_start = run_end = None
+            for offset, length in zip(entries['offset'].tolist(), entries['length'].tolist()):
+                if offset != run_end:
+                    if run_start is not None:
+                        f.seek(run_start)
+                        chunks.append(f.read(run_end - run_start))
+                    run_start = offset
+                run_end = offset + length
+            if run_start is not None:
+                f.seek(run_start)
+                chunks.append(f.read(run_end - run_start))
+        header = day.meta['header']
+        rows = pd.read_csv(io.BytesIO(b''.join(chunks)), names=header, header=None, dtype=str,
+                           keep_default_na=False, na_values=[''])
+        for column in TWEET_COLUMNS:
+            if column not in rows:
+                rows[column] = None
+        return rows[TWEET_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the raw tweet archive through its offset indexes")
+    parser.add_argument('--raw-dir', default="data/raw")
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--user', action='append', default=None)
+    parser.add_argument('--trend', action='append', default=None)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    archive = TweetArchive(args.raw_dir)
+    print(f"Indexed {archive.refresh()} new records")
+    total = 0
+    for batch in archive.scan(args.start, args.end, args.user, args.trend, args.batch_size):
+        total += len(batch)
+        print(f"batch of {len(batch)} tweets, {batch['date'].min()}..{batch['date'].max()}")
+    print(f"{total} matching tweets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Batched tweet embeddings with an on-disk cache, plus mini-batch k-means clustering.
+
+The default embedder is a hashed TF-IDF (signed feature hashing of words and
+bigrams into a fixed number of dimensions) that needs no model download. If
+sentence-transformers is installed, a local CPU model can be used instead.
+Vectors are cached by content hash in a memory-mapped float32 matrix, so a
+tweet is only ever embedded once per model.
+
+    python Analysis/embeddings.py [--raw-dir data/raw] [--clusters 20]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Local transformer models are optional
+    SentenceTransformer = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from seen_index import hash64  # noqa: E402
+from virality import load_raw  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[#@]?\w[\w']+")
+URL_PATTERN = re.compile(r'https?://\S+')
+
+
+def tokenize(text):
+    """Lowercased words, hashtags and mentions plus adjacent-word bigrams"""
+    words = TOKEN_PATTERN.findall(URL_PATTERN.sub(' ', (text or '').lower()))
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+class HashedTfidfEmbedder:
+    """Signed feature hashing of tokens into dim dimensions, weighted by sublinear TF and a frozen IDF.
+
+    The IDF table is itself hashed (idf_buckets entries) and fitted once; after
+    that the embedding of a text never changes, which is what makes caching
+    by content hash valid. Refitting changes the model name, and with it the cache.
+    """
+
+    def __init__(self, dim=256, idf_buckets=2 ** 18, idf=None):
+        self.dim = dim
+        self.idf_buckets = idf_buckets
+        self.idf = idf
+
+    @property
+    def name(self):
+        idf_digest = 'none' if self.idf is None else hashlib.blake2b(self.idf.tobytes(), digest_size=6).hexdigest()
+        return f'hashed-tfidf-{self.dim}-{idf_digest}'
+
+    def _features(self, tokens):
+        digests = [hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest() for t in tokens]
+        return np.frombuffer(b''.join(digests), dtype=np.uint64) if digests else np.zeros(0, dtype=np.uint64)
+
+    def fit_idf(self, texts):
+        """Fit and freeze the hashed IDF table from a corpus"""
+        df = np.zeros(self.idf_buckets, dtype=np.int64)
+        n = 0
+        for text in texts:
+            features = self._features(set(tokenize(text)))
+            df[np.unique(features % self.idf_buckets).astype(np.int64)] += 1
+            n += 1
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts):
+        """Embed a batch of texts into L2-normalized float32 rows"""
+        if self.idf is None:
+            self.fit_idf(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(tokenize(text))
+            if not len(features):
+                continue
+            unique, counts = np.unique(features, return_counts=True)
+            weights = (1 + np.log(counts)).astype(np.float32) * self.idf[(unique % self.idf_buckets).astype(np.int64)]
+            # Top hash bit picks the sign, so collisions cancel out on average
+            signs = np.where((unique >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], (unique % np.uint64(self.dim)).astype(np.int64), signs * weights)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model run on CPU"""
+
+    def __init__(self, model_name='all-MiniLM-L6-v2', batch_size=256):
+        if SentenceTransformer is None:
+            raise ImportError("SentenceTransformerEmbedder requires sentence-transformers")
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.batch_size = batch_size
+        self.name = f'st-{model_name}'
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        return self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+class EmbeddingCache:
+    """Append-only float32 matrix of embeddings keyed by content hash.
+
+    Rows live in vectors.f32 and their keys in keys.u64 under a per-model
+    directory. Reads go through a memory map, and lookups are a vectorized
+    binary search over the sorted keys.
+    """
+
+    def __init__(self, directory, model_name, dim):
+        self.directory = os.path.join(directory, model_name)
+        self.model_name = model_name
+        self.dim = dim
+        self.vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self.keys_path = os.path.join(self.directory, 'keys.u64')
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump({'model': model_name, 'dim': dim}, f)
+        self._load()
+
+    def _load(self):
+        keys = np.fromfile(self.keys_path, dtype=np.uint64) if os.path.exists(self.keys_path) else np.zeros(0, np.uint64)
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        # A crash between the two appends can leave keys without vectors; ignore those
+        self.keys = keys[:rows]
+        self.order = np.argsort(self.keys, kind='stable')
+        self.sorted_keys = self.keys[self.order]
+        self.vectors = (np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(len(self.keys), self.dim))
+                        if len(self.keys) else np.zeros((0, self.dim), dtype=np.float32))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, hashes):
+        """Return cache row numbers for hashes, -1 where missing"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.sorted_keys):
+            return np.full(len(hashes), -1, dtype=np.int64)
+        pos = np.searchsorted(self.sorted_keys, hashes).clip(max=len(self.sorted_keys) - 1)
+        found = self.sorted_keys[pos] == hashes
+        return np.where(found, self.order[pos], -1)
+
+    def append(self, hashes, vectors):
+        """Add new rows and refresh the memory map"""
+        with open(self.vectors_path, 'ab') as f:
+            np.ascontiguousarray(vectors, dtype=np.float32).tofile(f)
+        with open(self.keys_path, 'ab') as f:
+            np.asarray(hashes, dtype=np.uint64).tofile(f)
+        self._load()
+
+
+def embed_texts(texts, embedder, cache, batch_size=4096):
+    """Embed texts, reusing cached vectors and embedding only the misses, in batches.
+
+    The embedder must be frozen: a HashedTfidfEmbedder needs its IDF fitted
+    first (as cluster_texts does), since fitting it lazily on the first batch
+    of misses would store vectors with run-dependent weights under one key.
+    """
+    if getattr(embedder, 'idf', False) is None:
+        raise ValueError("Fit the embedder's IDF (fit_idf) before embedding through a cache")
+    if cache.model_name != embedder.name:
+        raise ValueError(f"Cache holds {cache.model_name} vectors, not {embedder.name}")
+    texts = list(texts)
+    hashes = np.array([hash64(t) for t in texts], dtype=np.uint64)
+    unique_hashes, first = np.unique(hashes, return_index=True)
+    missing = cache.lookup(unique_hashes) < 0
+    missing_hashes, missing_rows = unique_hashes[missing], first[missing]
+    if len(missing_hashes):
+        logger.info(f"Embedding {len(missing_hashes)} new texts ({len(texts) - len(missing_hashes)} cached or repeated)")
+        for start in range(0, len(missing_hashes), batch_size):
+            rows = missing_rows[start:start + batch_size]
+            cache.append(missing_hashes[start:start + batch_size], embedder.embed([texts[i] for i in rows]))
+    return np.asarray(cache.vectors[cache.lookup(hashes)])
+
+
+class MiniBatchKMeans:
+    """Spherical mini-batch k-means for L2-normalized vectors (cosine similarity)"""
+
+    def __init__(self, n_clusters=20, batch_size=4096, iterations=100, seed=0):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+        self.centers = None
+        self.counts = None
+
+    def _init_centers(self, X):
+        # k-means++ seeding on a sample keeps the start cheap for large inputs
+        sample = X[self.rng.choice(len(X), size=min(len(X), 20 * self.n_clusters), replace=False)]
+        centers = [sample[self.rng.integers(len(sample))]]
+        for _ in range(1, min(self.n_clusters, len(sample))):
+            distance = 1 - np.max(sample @ np.array(centers).T, axis=1)
+            p = np.clip(distance, 0, None)
+            p = p / p.sum() if p.sum() > 0 else None
+            centers.append(sample[self.rng.choice(len(sample), p=p)])
+        self.centers = np.array(centers, dtype=np.float32)
+        self.counts = np.zeros(len(self.centers), dtype=np.int64)
+
+    def partial_fit(self, batch):
+        """Update the centers with one mini-batch"""
+        if self.centers is None:
+            self._init_centers(batch)
+        labels = np.argmax(batch @ self.centers.T, axis=1)
+        # One-hot matmul sums the members of each center far faster than np.add.at
+        assignment = np.zeros((len(self.centers), len(batch)), dtype=np.float32)
+        assignment[labels, np.arange(len(batch))] = 1
+        sums = assignment @ batch
+        hits = np.bincount(labels, minlength=len(self.centers))
+        self.counts += hits
+        # Per-center learning rate 1/count, as in Sculley's mini-batch k-means
+        rate = np.where(self.counts > 0, hits / np.maximum(self.counts, 1), 0)[:, None].astype(np.float32)
+        means = sums / np.maximum(hits, 1)[:, None]
+        self.centers = (1 - rate) * self.centers + rate * means
+        norms = np.linalg.norm(self.centers, axis=1, keepdims=True)
+        self.centers /= np.where(norms > 0, norms, 1)
+        return self
+
+    def fit(self, X):
+        for _ in range(self.iterations):
+            self.partial_fit(X[self.rng.integers(0, len(X), size=min(self.batch_size, len(X)))])
+        return self
+
+    def predict(self, X, chunk_size=65536):
+        """Nearest center for every row, computed chunk by chunk to bound memory"""
+        return np.concatenate([np.argmax(X[i:i + chunk_size] @ self.centers.T, axis=1)
+                               for i in range(0, len(X), chunk_size)]) if len(X) else np.zeros(0, dtype=np.int64)
+
+
+def cluster_texts(texts, embedder=None, cache_dir="data/embeddings", n_clusters=20):
+    """Embed (with caching) and cluster texts; returns (labels, vectors, model)"""
+    embedder = embedder or HashedTfidfEmbedder()
+    if getattr(embedder, 'idf', False) is None:
+        idf_path = os.path.join(cache_dir, f'idf-{embedder.dim}.npy')
+        if os.path.exists(idf_path):
+            embedder.idf = np.load(idf_path)
+        else:
+            embedder.fit_idf(texts)
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(idf_path, embedder.idf)
+    cache = EmbeddingCache(cache_dir, embedder.name, embedder.dim)
+    vectors = embed_texts(texts, embedder, cache)
+    model = MiniBatchKMeans(n_clusters=min(n_clusters, len(vectors))).fit(vectors)
+    return model.predict(vectors), vectors, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed and cluster collected tweets")
+    parser.add_argument('--raw-dir', default="data/raw")
+    parser.add_argument('--cache-dir', default="data/embeddings")
+    parser.add_argument('--clusters', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_raw(args.raw_dir)['content'].dropna().astype(str).tolist()
+    if not texts:
+        print("No tweets to cluster")
+        return
+    labels, vectors, model = cluster_texts(texts, cache_dir=args.cache_dir, n_clusters=args.clusters)
+    sizes = np.bincount(labels, minlength=len(model.centers))
+    for cluster in np.argsort(-sizes):
+        if not sizes[cluster]:
+            continue
+        members = np.flatnonzero(labels == cluster)
+        closest = members[np.argsort(-(vectors[members] @ model.centers[cluster]))[:args.samples]]
+        print(f"cluster {cluster} ({sizes[cluster]} tweets)")
+        for i in closest:
+            print(f"    {texts[i][:100]}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
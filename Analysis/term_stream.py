@@ -0,0 +1,225 @@
+"""Streaming hashtag, mention and n-gram counts over sliding time windows.
+
+Feed it tweets as the scraper saves them:
+
+    stream = TermStream()
+    scraper = TwitterScraper(username, password, listeners=[stream.consume])
+    ...
+    stream.top_rising(10)
+
+Counts live in count-min sketches, one ring of time buckets per window, so
+memory is fixed no matter how many tweets go through. Each window also keeps a
+bounded set of heavy-hitter candidates, which is all a top-k query looks at.
+"""
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+
+HASHTAG_PATTERN = re.compile(r'#\w+')
+MENTION_PATTERN = re.compile(r'@\w+')
+URL_PATTERN = re.compile(r'https?://\S+')
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can did do does for from had has have he her his how i if in is it its
+just me my no not of on or our so that the their them then there they this to too was we were what when
+who will with you your rt amp
+""".split())
+
+DEFAULT_WINDOWS = {'5m': 300, '1h': 3600, '24h': 86400}
+
+
+def extract_terms(text, ngram=2):
+    """Return the hashtags, mentions and word n-grams (up to ngram words) in a tweet"""
+    if not text:
+        return []
+    text = URL_PATTERN.sub(' ', text.lower())
+    terms = HASHTAG_PATTERN.findall(text) + MENTION_PATTERN.findall(text)
+    words = [w for w in WORD_PATTERN.findall(HASHTAG_PATTERN.sub(' ', MENTION_PATTERN.sub(' ', text)))
+             if w not in STOPWORDS]
+    for n in range(1, ngram + 1):
+        terms.extend(' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return terms
+
+
+def term_kind(term):
+    """Classify a term as 'hashtag', 'mention' or 'ngram'"""
+    if term.startswith('#'):
+        return 'hashtag'
+    if term.startswith('@'):
+        return 'mention'
+    return 'ngram'
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch; estimates never undercount"""
+
+    def __init__(self, width=4096, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def indexes(self, term):
+        """Return the column hit by term in each row"""
+        digest = hashlib.blake2b(term.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def add(self, indexes, counts):
+        """Add counts (shape (n,)) for n terms given their indexes (shape (n, depth))"""
+        rows = np.broadcast_to(self._rows, indexes.shape)
+        np.add.at(self.table, (rows, indexes), np.broadcast_to(np.asarray(counts)[:, None], indexes.shape))
+
+    def estimate(self, indexes):
+        return int(self.table[self._rows, indexes].min())
+
+    def estimate_many(self, indexes):
+        """Estimates for n terms given their indexes (shape (n, depth))"""
+        return self.table[np.broadcast_to(self._rows, indexes.shape), indexes].min(axis=1)
+
+
+class SlidingWindowCounter:
+    """Term counts over the last window_seconds, expired bucket by bucket"""
+
+    def __init__(self, window_seconds, buckets=12, width=4096, depth=4, capacity=256):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = window_seconds / buckets
+        self.total = CountMinSketch(width, depth)
+        self.buckets = np.zeros((buckets, depth, width), dtype=np.int64)
+        self.capacity = capacity
+        self.candidates = {}  # term -> sketch indexes
+        self._floor = 0
+        self._current = None
+
+    def advance(self, now):
+        """Drop the buckets that have slid out of the window"""
+        bucket = int(now // self.bucket_seconds)
+        if self._current is None:
+            self._current = bucket
+            return
+        expired = min(bucket - self._current, len(self.buckets))
+        for step in range(1, expired + 1):
+            slot = (self._current + step) % len(self.buckets)
+            self.total.table -= self.buckets[slot]
+            self.buckets[slot] = 0
+        if expired > 0:
+            # Counts only grow between expiries, so the cached floor is only stale after one
+            self._floor = 0
+        self._current = max(self._current, bucket)
+
+    def add(self, terms, indexes, counts):
+        """Count a batch of terms; indexes has shape (len(terms), depth)"""
+        slot = self._current % len(self.buckets)
+        rows = np.broadcast_to(self.total._rows, indexes.shape)
+        np.add.at(self.buckets[slot], (rows, indexes), np.broadcast_to(counts[:, None], indexes.shape))
+        self.total.add(indexes, counts)
+        for term, term_indexes, count in zip(terms, indexes, self.total.estimate_many(indexes)):
+            self._track(term, term_indexes, count)
+
+    def estimate(self, indexes):
+        return self.total.estimate(indexes)
+
+    def top(self, k=10, kind=None):
+        """Top k candidate terms by current estimated count"""
+        counts = []
+        for term, indexes in list(self.candidates.items()):
+            count = self.total.estimate(indexes)
+            if count <= 0:
+                del self.candidates[term]
+            elif kind is None or term_kind(term) == kind:
+                counts.append((term, count))
+        counts.sort(key=lambda item: item[1], reverse=True)
+        return counts[:k]
+
+    def _track(self, term, indexes, count):
+        if term in self.candidates:
+            return
+        if len(self.candidates) < self.capacity:
+            self.candidates[term] = indexes
+            return
+        # Space-saving style replacement: evict the weakest candidate if the new term beats it.
+        # The last weakest count is cached so most low-count terms are rejected without a scan.
+        if count <= self._floor:
+            return
+        names = list(self.candidates)
+        estimates = self.total.estimate_many(np.array([self.candidates[t] for t in names]))
+        weakest = names[int(estimates.argmin())]
+        weakest_count = int(estimates.min())
+        self._floor = weakest_count
+        if count > weakest_count:
+            del self.candidates[weakest]
+            self.candidates[term] = indexes
+
+
+class TermStream:
+    """Incremental hashtag/mention/n-gram counts over several sliding windows"""
+
+    def __init__(self, windows=None, ngram=2, buckets=12, width=4096, depth=4, capacity=256):
+        self.ngram = ngram
+        self.windows = {
+            name: SlidingWindowCounter(seconds, buckets, width, depth, capacity)
+            for name, seconds in (windows or DEFAULT_WINDOWS).items()
+        }
+        self._sketch = CountMinSketch(width, depth)
+        self._lock = threading.Lock()
+        self.tweets_seen = 0
+
+    def consume(self, tweets, now=None):
+        """Count the terms of a batch of tweet dicts at time now (default: current time)"""
+        now = time.time() if now is None else now
+        counts = {}
+        for tweet in tweets:
+            for term in extract_terms(tweet.get('content'), self.ngram):
+                counts[term] = counts.get(term, 0) + 1
+
+        if not counts:
+            return
+        terms = list(counts)
+        # Every window uses the same sketch shape, so hash each term once per batch
+        indexes = np.array([self._sketch.indexes(term) for term in terms])
+        values = np.array([counts[term] for term in terms], dtype=np.int64)
+
+        with self._lock:
+            for window in self.windows.values():
+                window.advance(now)
+                window.add(terms, indexes, values)
+            self.tweets_seen += len(tweets)
+
+    def count(self, term, window='1h', now=None):
+        """Estimated occurrences of term in a window"""
+        with self._lock:
+            counter = self.windows[window]
+            counter.advance(time.time() if now is None else now)
+            return counter.estimate(self._sketch.indexes(term))
+
+    def top(self, k=10, window='1h', kind=None, now=None):
+        """Most frequent terms in a window, optionally only 'hashtag', 'mention' or 'ngram'"""
+        with self._lock:
+            counter = self.windows[window]
+            counter.advance(time.time() if now is None else now)
+            return counter.top(k, kind)
+
+    def top_rising(self, k=10, short='5m', long='24h', kind=None, min_count=2, now=None):
+        """Terms whose rate in the short window most exceeds their rate in the long window.
+
+        Returns (term, short count, ratio) tuples; only the short window's
+        bounded candidate set is scored, so the cost does not grow with history.
+        """
+        with self._lock:
+            now = time.time() if now is None else now
+            fast, slow = self.windows[short], self.windows[long]
+            fast.advance(now)
+            slow.advance(now)
+            scale = slow.window_seconds / fast.window_seconds
+            rising = []
+            for term, count in fast.top(fast.capacity, kind):
+                if count < min_count:
+                    continue
+                baseline = slow.estimate(fast.candidates[term])
+                # Add-one smoothing so brand-new terms get a finite ratio
+                rising.append((term, count, count * scale / (baseline + 1)))
+            rising.sort(key=lambda item: item[2], reverse=True)
+            return rising[:k]
@@ -0,0 +1,130 @@
+"""Per-trend engagement velocity, acceleration and virality scores.
+
+Tweets are bucketed by posting time per trend, and rolling windows run over
+those buckets with pandas groupby/rolling, so the cost is a handful of
+vectorized passes no matter how many tweets there are. ViralityScorer keeps
+only the per-(trend, bucket) aggregates, so new batches are merged in without
+touching earlier tweets.
+
+    python Analysis/virality.py [--raw-dir data/raw] [--top 10]
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from normalize import ENGAGEMENT_WEIGHTS, normalize_tweets  # noqa: E402
+from archive import TweetArchive  # noqa: E402
+
+
+def load_raw(raw_dir="data/raw"):
+    """Load and normalize every raw day CSV"""
+    frames = [pd.read_csv(f, dtype=str, keep_default_na=False, na_values=[''])
+              for f in sorted(glob.glob(os.path.join(raw_dir, "tweets_*.csv")))]
+    if not frames:
+        return normalize_tweets(pd.DataFrame(columns=['username', 'content', 'date', 'likes',
+                                                      'retweets', 'replies', 'timestamp', 'trend']))
+    return normalize_tweets(pd.concat(frames, ignore_index=True))
+
+
+def bucket_tweets(df, bin_seconds=900):
+    """Aggregate typed tweets into per-(trend, time bucket) tweet and engagement totals"""
+    df = df[df['date'].notna()]
+    engagement = sum(df[column].to_numpy(dtype=np.float64) * weight
+                     for column, weight in ENGAGEMENT_WEIGHTS.items())
+    trend = df['trend'].astype('string').fillna('')
+    bucket = (df['date'].to_numpy(dtype=np.int64) // bin_seconds) * bin_seconds
+    return (pd.DataFrame({'trend': trend.to_numpy(), 'bucket': bucket, 'tweets': 1, 'engagement': engagement})
+            .groupby(['trend', 'bucket'], sort=False)
+            .sum()
+            .reset_index())
+
+
+def score_buckets(buckets, window='1h'):
+    """Rolling velocity, acceleration and virality score for every (trend, bucket) row"""
+    if buckets.empty:
+        return buckets.assign(tweet_velocity=[], engagement_velocity=[], acceleration=[], virality=[])
+    buckets = buckets.sort_values(['trend', 'bucket'], ignore_index=True)
+    buckets['time'] = pd.to_datetime(buckets['bucket'], unit='s', utc=True)
+    hours = pd.Timedelta(window) / pd.Timedelta(hours=1)
+
+    rolled = (buckets.groupby('trend', sort=False)
+              .rolling(window, on='time')[['tweets', 'engagement']]
+              .sum()
+              .reset_index(drop=True))
+    buckets['tweet_velocity'] = rolled['tweets'].to_numpy() / hours
+    buckets['engagement_velocity'] = rolled['engagement'].to_numpy() / hours
+
+    # Change in engagement velocity per hour between consecutive buckets of the same trend
+    same_trend = buckets['trend'].eq(buckets['trend'].shift())
+    elapsed = buckets['bucket'].diff().to_numpy(dtype=np.float64) / 3600
+    change = buckets['engagement_velocity'].diff().to_numpy()
+    buckets['acceleration'] = np.where(same_trend & (elapsed > 0), change / np.where(elapsed > 0, elapsed, 1), 0.0)
+
+    # Log-scaled velocity, boosted (or damped) by how fast it is changing relative to itself
+    velocity = buckets['engagement_velocity'].to_numpy() + buckets['tweet_velocity'].to_numpy()
+    momentum = np.clip(buckets['acceleration'].to_numpy() / (velocity + 1), -1, 1)
+    buckets['virality'] = np.log1p(velocity) * (1 + momentum)
+    return buckets
+
+
+class ViralityScorer:
+    """Keeps per-(trend, bucket) aggregates so new tweets can be scored incrementally"""
+
+    def __init__(self, bin_seconds=900, window='1h'):
+        self.bin_seconds = bin_seconds
+        self.window = window
+        self.buckets = pd.DataFrame({'trend': pd.Series(dtype='string'), 'bucket': pd.Series(dtype='int64'),
+                                     'tweets': pd.Series(dtype='int64'), 'engagement': pd.Series(dtype='float64')})
+        self.scores = score_buckets(self.buckets.copy(), window)
+
+    def update(self, df):
+        """Merge a batch of typed tweets and rescore only the trends it touched"""
+        new = bucket_tweets(df, self.bin_seconds)
+        if new.empty:
+            return self.scores
+        self.buckets = (pd.concat([self.buckets, new], ignore_index=True)
+                        .groupby(['trend', 'bucket'], sort=False)
+                        .sum()
+                        .reset_index())
+
+        # Rescore from the (small) bucket aggregates of the trends in this batch only
+        touched = self.buckets['trend'].isin(new['trend'].unique())
+        rescored = score_buckets(self.buckets[touched].copy(), self.window)
+        self.scores = pd.concat([self.scores[~self.scores['trend'].isin(new['trend'].unique())], rescored],
+                                ignore_index=True)
+        return self.scores
+
+    def latest(self, top=None):
+        """Most recent score of every trend, highest virality first"""
+        if self.scores.empty:
+            return self.scores
+        latest = (self.scores.sort_values('bucket')
+                  .groupby('trend', sort=False)
+                  .tail(1)
+                  .sort_values('virality', ascending=False, ignore_index=True))
+        return latest if top is None else latest.head(top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score trends in the raw tweet store by virality")
+    parser.add_argument('--raw-dir', default="data/raw")
+    parser.add_argument('--window', default='1h')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--start', default=None, help='only score tweets posted on or after this date')
+    args = parser.parse_args()
+
+    # Stream the archive in batches so memory stays flat however many days there are
+    scorer = ViralityScorer(window=args.window)
+    for batch in TweetArchive(args.raw_dir).scan(start=args.start):
+        scorer.update(batch)
+    print(scorer.latest(args.top)[['trend', 'time', 'tweet_velocity', 'engagement_velocity',
+                                   'acceleration', 'virality']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
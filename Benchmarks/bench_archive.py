@@ -0,0 +1,95 @@
+"""Compare reading the whole raw archive with pandas against an indexed archive scan.
+
+Writes --days synthetic day files of --rows tweets each (in the CSVSink
+layout), then answers a one-week query both ways. Each run happens in a fresh
+subprocess so its peak RSS can be reported on its own.
+
+    python Benchmarks/bench_archive.py [--days 30] [--rows 50000]
+"""
+import argparse
+import csv
+import glob
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Analysis'))
+from archive import TweetArchive  # noqa: E402
+
+START = datetime(2025, 5, 1, tzinfo=timezone.utc)
+COLUMNS = ['username', 'content', 'date', 'likes', 'retweets', 'replies', 'timestamp', 'trend']
+
+
+def write_archive(raw_dir, days, rows):
+    rng = random.Random(0)
+    words = "goal keeper final league united match fans season trade rumor transfer win loss".split()
+    for d in range(days):
+        day = START + timedelta(days=d)
+        with open(os.path.join(raw_dir, f"tweets_{day:%Y%m%d}.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for _ in range(rows):
+                posted = day + timedelta(seconds=rng.randrange(86400))
+                writer.writerow([f"user{rng.randrange(5000)}", ' '.join(rng.choices(words, k=rng.randrange(5, 30))),
+                                 posted.strftime('%Y-%m-%dT%H:%M:%S.000Z'), rng.randrange(1000),
+                                 rng.randrange(100), rng.randrange(50), posted.strftime('%Y-%m-%d %H:%M:%S'),
+                                 f"trend{rng.randrange(50)}"])
+
+
+def run_pandas(raw_dir, start, end):
+    import pandas as pd
+    df = pd.concat([pd.read_csv(f, dtype=str, keep_default_na=False, na_values=[''])
+                    for f in sorted(glob.glob(os.path.join(raw_dir, "tweets_*.csv")))], ignore_index=True)
+    dates = pd.to_datetime(df['date'], utc=True)
+    return int(((dates >= start) & (dates < end)).sum())
+
+
+def run_archive(raw_dir, start, end):
+    return sum(len(batch) for batch in TweetArchive(raw_dir).scan(start=start, end=end))
+
+
+def child(mode, raw_dir, start, end):
+    began = time.perf_counter()
+    count = (run_pandas if mode == 'pandas' else run_archive)(raw_dir, start, end)
+    elapsed = time.perf_counter() - began
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{count} {elapsed} {peak_mib}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    start = (START + timedelta(days=7)).isoformat()
+    end = (START + timedelta(days=14)).isoformat()
+    with tempfile.TemporaryDirectory() as raw_dir:
+        began = time.perf_counter()
+        write_archive(raw_dir, args.days, args.rows)
+        size = sum(os.path.getsize(f) for f in glob.glob(os.path.join(raw_dir, '*.csv'))) / 2**20
+        print(f"wrote {args.days} days x {args.rows:,} tweets ({size:.0f} MiB) in {time.perf_counter() - began:.1f}s")
+
+        began = time.perf_counter()
+        TweetArchive(raw_dir).refresh()
+        print(f"built offset indexes in {time.perf_counter() - began:.1f}s")
+
+        print(f"{'one-week query':<22}{'tweets':>10}{'seconds':>10}{'peak MiB':>10}")
+        for mode in ('pandas', 'archive'):
+            out = subprocess.run([sys.executable, __file__, '--child', mode, raw_dir, start, end],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            count, elapsed, peak = int(out[0]), float(out[1]), float(out[2])
+            print(f"{mode:<22}{count:>10,}{elapsed:>10.2f}{peak:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Measure how much idle time per scrape cycle the asyncio core gives back.
+
+Runs one trending cycle against a simulated driver (fixed per-call latency
+standing in for chromedriver round-trips, politeness delays scaled down by
+--scale) three ways: the blocking TwitterScraper, one AsyncTwitterScraper and
+two AsyncTwitterScrapers sharing an event loop. A heartbeat task ticks on the
+loop every 10 ms; its tick count is the time the loop had free for other work.
+
+    python Benchmarks/bench_async_idle.py [--trends 6] [--scale 0.05] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from async_scraper import AsyncTwitterScraper  # noqa: E402
+from extraction import EXTRACT_TWEETS_JS  # noqa: E402
+from pacing import PAGE_STATE_JS  # noqa: E402
+from seen_index import SeenIndex  # noqa: E402
+from storage import CSVSink  # noqa: E402
+from twitter import TwitterScraper  # noqa: E402
+
+TICK = 0.01
+
+
+class SimulatedDriver:
+    """Just enough of the WebDriver API for a trending cycle, with a fixed latency per call"""
+
+    def __init__(self, trends, latency, tweets_per_page=40, batch=5):
+        self.trends = trends
+        self.latency = latency
+        self.tweets_per_page = tweets_per_page
+        self.batch = batch
+        self.current_url = 'about:blank'
+        self.visible = batch
+        self.calls = 0
+
+    def _round_trip(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def get(self, url):
+        self._round_trip()
+        self.current_url = url
+        self.visible = self.batch
+
+    def find_element(self, by, value):
+        self._round_trip()
+        return object()
+
+    def get_cookies(self):
+        self._round_trip()
+        return []
+
+    def quit(self):
+        pass
+
+    def execute_script(self, script, *args):
+        self._round_trip()
+        if script == EXTRACT_TWEETS_JS:
+            skip = set(args[1] or [])
+            page = self.current_url
+            return [
+                {'username': f'user{i}', 'content': f'{page} tweet {i}', 'date': '2025-05-21T19:51:01.000Z',
+                 'likes': '1', 'retweets': None, 'replies': None, 'status_id': f'{abs(hash(page)) % 10**6}{i}'}
+                for i in range(self.visible) if f'{abs(hash(page)) % 10**6}{i}' not in skip
+            ]
+        if script == PAGE_STATE_JS:
+            return [self.visible, self.visible * 500]
+        if 'data-testid=\\"trend\\"' in script or 'data-testid="trend"' in script:
+            return [f'{i + 1} · Trending\n{name}\n{i + 1}K posts' for i, name in enumerate(self.trends)]
+        if 'window.scrollTo' in script:
+            self.visible = min(self.visible + self.batch, self.tweets_per_page)
+        if script.startswith('return document.body.scrollHeight'):
+            return self.visible * 500
+        return None
+
+
+def make_scraper(cls, trends, args, tmp):
+    scraper = cls('', '', driver=SimulatedDriver(trends, args.latency),
+                  sink=CSVSink(directory=tmp), seen_index=SeenIndex(os.path.join(tmp, 'seen.bin')))
+    low, high = scraper.pacer.jitter_range
+    scraper.pacer.jitter_range = (low * args.scale, high * args.scale)
+    return scraper
+
+
+async def heartbeat(counter):
+    while True:
+        await asyncio.sleep(TICK)
+        counter[0] += 1
+
+
+def bench_sync(trends, args, tmp):
+    scraper = make_scraper(TwitterScraper, trends, args, tmp)
+    wall, cpu = time.perf_counter(), time.process_time()
+    tweets = scraper.get_trending_tweets(args.max_tweets)
+    return len(tweets), time.perf_counter() - wall, time.process_time() - cpu, 0.0
+
+
+async def bench_async(trends, args, tmp, sessions):
+    scrapers = [AsyncTwitterScraper(make_scraper(TwitterScraper, trends, args, os.path.join(tmp, str(i)))) for i in range(sessions)]
+    counter = [0]
+    ticker = asyncio.create_task(heartbeat(counter))
+    wall, cpu = time.perf_counter(), time.process_time()
+
+    all_trends = await scrapers[0].get_trend_list()
+    shares = [all_trends[i::sessions] for i in range(sessions)]
+    results = await asyncio.gather(*(
+        s.get_trending_tweets(args.max_tweets, trends=share) for s, share in zip(scrapers, shares)
+    ))
+
+    elapsed, cpu_used = time.perf_counter() - wall, time.process_time() - cpu
+    ticker.cancel()
+    return sum(len(r) for r in results), elapsed, cpu_used, counter[0] * TICK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--trends', type=int, default=6)
+    parser.add_argument('--max-tweets', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=0.05, help='multiplier applied to the politeness jitter')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per simulated WebDriver call')
+    args = parser.parse_args()
+
+    trends = [f'Trend{i}' for i in range(args.trends)]
+    print(f"{'mode':<18}{'tweets':>8}{'wall s':>9}{'cpu s':>8}{'cpu idle':>10}{'loop free s':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [('blocking', bench_sync(trends, args, os.path.join(tmp, 'sync')))]
+        rows.append(('asyncio x1', asyncio.run(bench_async(trends, args, os.path.join(tmp, 'a1'), 1))))
+        rows.append(('asyncio x2', asyncio.run(bench_async(trends, args, os.path.join(tmp, 'a2'), 2))))
+    for name, (n, wall, cpu, free) in rows:
+        print(f"{name:<18}{n:>8}{wall:>9.2f}{cpu:>8.2f}{1 - cpu / wall:>10.1%}{free:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
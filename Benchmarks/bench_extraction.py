@@ -0,0 +1,97 @@
+"""Compare WebDriver round-trips per tweet for per-element vs. batched extraction.
+
+Loads the saved search fixture in headless Chrome and runs both extraction
+strategies against it, counting every command sent to chromedriver.
+
+    python Benchmarks/bench_extraction.py [--runs 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from extraction import TWEET_SELECTOR, extract_tweets  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'search_live.html')
+
+
+class RoundTripCounter:
+    """Count commands sent over the chromedriver protocol"""
+
+    def __init__(self, driver):
+        self.count = 0
+        self._execute = driver.execute
+
+        def counting_execute(*args, **kwargs):
+            self.count += 1
+            return self._execute(*args, **kwargs)
+
+        # WebElement calls are routed through their parent driver's execute()
+        driver.execute = counting_execute
+
+
+def extract_per_element(driver):
+    """The previous extraction: one find_element/.text/get_attribute call per field"""
+    tweets = []
+    for tweet in driver.find_elements(By.CSS_SELECTOR, TWEET_SELECTOR):
+        tweet_data = {'username': None, 'content': None, 'date': None,
+                      'likes': None, 'retweets': None, 'replies': None}
+        try:
+            tweet_data['username'] = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="User-Name"]').text.split('\n')[0]
+        except Exception:
+            pass
+        try:
+            tweet_data['content'] = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetText"]').text
+        except Exception:
+            pass
+        try:
+            tweet_data['date'] = tweet.find_element(By.TAG_NAME, 'time').get_attribute('datetime')
+        except Exception:
+            pass
+        for metric in tweet.find_elements(By.CSS_SELECTOR, 'div[data-testid$="-count"]'):
+            metric_type = metric.get_attribute('data-testid')
+            if 'like' in metric_type:
+                tweet_data['likes'] = metric.text
+            elif 'retweet' in metric_type:
+                tweet_data['retweets'] = metric.text
+            elif 'reply' in metric_type:
+                tweet_data['replies'] = metric.text
+        tweets.append(tweet_data)
+    return tweets
+
+
+def run(driver, counter, extract, runs):
+    counter.count = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        tweets = extract(driver)
+    elapsed = (time.perf_counter() - start) / runs
+    return len(tweets), counter.count / runs, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    driver = webdriver.Chrome(options=options)
+    try:
+        driver.get('file://' + FIXTURE)
+        counter = RoundTripCounter(driver)
+        print(f"{'strategy':<14}{'tweets':>8}{'round-trips':>14}{'per tweet':>12}{'ms/page':>10}")
+        for name, extract in (('per-element', extract_per_element), ('batched', extract_tweets)):
+            n, trips, elapsed = run(driver, counter, extract, args.runs)
+            print(f"{name:<14}{n:>8}{trips:>14.0f}{trips / max(n, 1):>12.2f}{elapsed * 1000:>10.1f}")
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
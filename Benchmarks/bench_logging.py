@@ -0,0 +1,98 @@
+"""Measure what logging costs the extraction hot path, before and after the queued JSON logger.
+
+Replays the log calls of --trends trend visits of --tweets tweets each, three ways:
+
+  inline    the old setup: basicConfig file handler, an f-string INFO line per tweet
+  queued    configure_logging: per-tweet lines at DEBUG (dropped), one summary per trend
+  sampled   configure_logging at DEBUG with 1% of per-tweet lines kept
+
+Reports the time spent in the scraping thread, the time until the listener has
+written everything, and the log volume. Each run is a separate subprocess.
+
+    python Benchmarks/bench_logging.py [--trends 200] [--tweets 500]
+"""
+import argparse
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from jsonlog import CONSOLE_FORMAT, configure_logging, stop_logging  # noqa: E402
+
+WORDS = "goal keeper final league united match fans season trade rumor transfer win loss".split()
+
+
+def workload(trends, tweets):
+    rng = random.Random(0)
+    return [(f"trend{t}", [' '.join(rng.choices(WORDS, k=rng.randrange(5, 40))) for _ in range(tweets)])
+            for t in range(trends)]
+
+
+def run_inline(visits, path):
+    logging.basicConfig(filename=path, level=logging.INFO, format=CONSOLE_FORMAT)
+    logger = logging.getLogger('twitter')
+    for name, contents in visits:
+        for content in contents:
+            logger.info(f"Extracted tweet: {content[:50]}...")
+        logger.info(f"Collected {len(contents)} tweets for trend {name}")
+
+
+def run_queued(visits, path, level=logging.INFO, sample=None):
+    configure_logging(path, level=level, console=False, sample=sample)
+    logger = logging.getLogger('twitter')
+    for name, contents in visits:
+        started = time.monotonic()
+        for content in contents:
+            logger.debug("Extracted tweet: %.50s...", content, extra={'event': 'tweet_extracted'})
+        seconds = time.monotonic() - started
+        logger.info("Collected %d tweets for trend %s (%d duplicates, %.1fs)", len(contents), name, 0, seconds,
+                    extra={'event': 'trend_summary', 'trend': name, 'tweets': len(contents),
+                           'duplicates': 0, 'seconds': round(seconds, 2)})
+
+
+def child(mode, trends, tweets, path):
+    visits = workload(int(trends), int(tweets))
+    began = time.perf_counter()
+    if mode == 'inline':
+        run_inline(visits, path)
+    elif mode == 'queued':
+        run_queued(visits, path)
+    else:
+        run_queued(visits, path, logging.DEBUG, {'tweet_extracted': 0.01})
+    caller = time.perf_counter() - began
+    stop_logging()
+    logging.shutdown()
+    total = time.perf_counter() - began
+    print(f"{caller} {total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--trends', type=int, default=200)
+    parser.add_argument('--tweets', type=int, default=500)
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    count = args.trends * args.tweets
+    print(f"{args.trends} trends x {args.tweets} tweets")
+    print(f"{'mode':<10}{'caller us/tweet':>17}{'total s':>10}{'log lines':>11}{'log KiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('inline', 'queued', 'sampled'):
+            path = os.path.join(directory, f"{mode}.log")
+            out = subprocess.run([sys.executable, __file__, '--child', mode, str(args.trends), str(args.tweets), path],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            caller, total = float(out[0]), float(out[1])
+            with open(path, 'rb') as f:
+                lines = sum(1 for _ in f)
+            print(f"{mode:<10}{caller / count * 1e6:>17.2f}{total:>10.2f}{lines:>11,}{os.path.getsize(path) / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""End-to-end scrape benchmark against the local replay server.
+
+Starts a ReplayServer, injects a headless Chrome into TwitterScraper and runs
+a full trending cycle (trend list, then every trend's live search with
+infinite scroll) plus one profile scrape, all offline. Reports tweets/sec,
+WebDriver round-trips per tweet and the latency of every scrape stage and
+pacer wait, as recorded by the scraper's metrics. Politeness jitter is scaled
+by --scale.
+
+    python Benchmarks/bench_replay.py [--repeat 10] [--max-tweets 20] [--latency 0.05] [--scale 0.1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from selenium import webdriver
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from bench_extraction import RoundTripCounter  # noqa: E402
+from replay_server import ReplayServer, load_fixture  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from seen_index import SeenIndex  # noqa: E402
+from storage import CSVSink  # noqa: E402
+from twitter import TwitterScraper  # noqa: E402
+
+
+def print_histogram(title, label, series):
+    print(f"\n{title:<22}{'calls':>7}{'total s':>10}{'mean ms':>10}")
+    for key, state in sorted(series.items()):
+        labels = dict(key)
+        name = labels[label] + (' (timeout)' if labels.get('outcome') == 'timeout' else '')
+        count, total = state[-1], state[-2]
+        print(f"{name:<22}{count:>7}{total:>10.2f}{total / max(count, 1) * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10, help='copies of each recorded tweet')
+    parser.add_argument('--batch', type=int, default=5, help='articles per page load / scroll')
+    parser.add_argument('--max-tweets', type=int, default=20, help='tweets per trend')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to each scroll fetch')
+    parser.add_argument('--scale', type=float, default=0.1, help='multiplier applied to the politeness jitter')
+    args = parser.parse_args()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--window-size=1280,900')
+
+    metrics = Metrics()
+    with ReplayServer(load_fixture(repeat=args.repeat), batch=args.batch, latency=args.latency) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        driver = webdriver.Chrome(options=options)
+        counter = RoundTripCounter(driver)
+        scraper = TwitterScraper('', '', driver=driver, base_url=server.base_url, metrics=metrics,
+                                 sink=CSVSink(directory=tmp), seen_index=SeenIndex(os.path.join(tmp, 'seen.bin')))
+        low, high = scraper.pacer.jitter_range
+        scraper.pacer.jitter_range = (low * args.scale, high * args.scale)
+
+        try:
+            start = time.perf_counter()
+            tweets = scraper.get_trending_tweets(args.max_tweets)
+            elapsed = time.perf_counter() - start
+            trips = counter.count
+
+            profile = server.fixture['tweets'][0]['handle']
+            counter.count = 0
+            profile_start = time.perf_counter()
+            profile_tweets = scraper.get_user_tweets(profile, args.max_tweets)
+            profile_elapsed = time.perf_counter() - profile_start
+            profile_trips = counter.count
+        finally:
+            scraper.close()
+
+        print(f"\n{'run':<22}{'tweets':>8}{'wall s':>9}{'tweets/s':>10}{'round-trips':>13}{'per tweet':>11}")
+        for name, n, wall, count in (('trending cycle', len(tweets), elapsed, trips),
+                                     (f'profile @{profile}', len(profile_tweets), profile_elapsed, profile_trips)):
+            print(f"{name:<22}{n:>8}{wall:>9.2f}{n / wall:>10.1f}{count:>13}{count / max(n, 1):>11.2f}")
+        print(f"HTTP requests served: {server.requests}")
+
+        print_histogram('stage', 'stage', metrics.histograms.get('scraper_stage_seconds', {}))
+        print_histogram('pacer wait', 'wait', metrics.histograms.get('pacer_wait_seconds', {}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Compare the fixed trending cycle with the AdaptiveScheduler on simulated trends.
+
+Each trend posts tweets as a Poisson stream with its own rate (a few hot ones,
+a long tail of slow or dead ones). A visit returns the newest `depth` tweets
+posted since the previous visit, like the live search tab with a since-id
+checkpoint; anything older is lost. Browser time per visit is a page-load
+overhead plus a cost per tweet, and every page load and scroll counts as a
+request. Both policies run for --hours of simulated time; no browser is used.
+Unless --budget is given, the adaptive scheduler gets the request rate the
+fixed cycle actually used, so both are compared at an equal budget.
+
+    python Benchmarks/bench_scheduler.py [--trends 30] [--hours 6] [--budget N]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Scrapers'))
+from priority import AdaptiveScheduler  # noqa: E402
+
+OVERHEAD = 6.0  # Seconds of page load and settling per visit
+PER_TWEET = 0.4  # Seconds of scrolling and extraction per tweet
+PER_SCROLL = 5  # Tweets that appear per scroll
+
+
+class SimulatedTrends:
+    def __init__(self, count, seed=0):
+        rng = random.Random(seed)
+        self.rng = rng
+        # Tweets per second: lognormal, so a handful of trends dominate
+        self.rates = {f"trend{i}": math.exp(rng.gauss(-4.5, 1.5)) for i in range(count)}
+        self.last_visit = {name: 0.0 for name in self.rates}
+        self.posted = 0.0
+
+    def trend_list(self):
+        return [{'name': name, 'url': f"https://x.com/search?q={name}&f=live"} for name in self.rates]
+
+    def visit(self, name, depth, now):
+        """(tweets fetched, tweets missed, browser seconds, requests) for visiting a trend at now"""
+        span = now - self.last_visit[name]
+        self.last_visit[name] = now
+        posted = self._poisson(self.rates[name] * span)
+        fetched = min(posted, depth)
+        tweets = [{
+            'date': datetime.fromtimestamp(now - self.rng.uniform(0, span), timezone.utc).isoformat(),
+            'likes': self.rng.randrange(100), 'retweets': self.rng.randrange(20), 'replies': self.rng.randrange(10),
+        } for _ in range(fetched)]
+        scrolls = math.ceil(fetched / PER_SCROLL)
+        return tweets, posted - fetched, OVERHEAD + PER_TWEET * fetched, 1 + scrolls
+
+    def _poisson(self, mean):
+        if mean > 50:
+            return max(0, int(round(self.rng.gauss(mean, math.sqrt(mean)))))
+        limit, k, product = math.exp(-mean), 0, self.rng.random()
+        while product > limit:
+            k += 1
+            product *= self.rng.random()
+        return k
+
+
+def run_fixed(trends, duration, depth=5, pause=312.5):
+    """The old main(): every trend at a fixed depth, then sleep ~300 s plus the 10-15 s delay"""
+    now = fetched = missed = busy = requests = 0
+    while now < duration:
+        now += OVERHEAD
+        busy += OVERHEAD
+        requests += 1
+        for trend in trends.trend_list():
+            tweets, lost, seconds, calls = trends.visit(trend['name'], depth, now)
+            now += seconds
+            busy += seconds
+            fetched, missed, requests = fetched + len(tweets), missed + lost, requests + calls
+        now += pause
+    return fetched, missed, busy, requests
+
+
+def run_adaptive(trends, duration, budget):
+    scheduler = AdaptiveScheduler(request_budget=budget)
+    now = fetched = missed = busy = requests = 0
+    while now < duration:
+        if scheduler.trends_due(now):
+            scheduler.update_trends(trends.trend_list(), now)
+            scheduler.requests.append((now, 1))
+            now += OVERHEAD
+            busy += OVERHEAD
+            requests += 1
+            continue
+        trend, depth, wait = scheduler.next(now)
+        if trend is None:
+            now += wait
+            continue
+        tweets, lost, seconds, calls = trends.visit(trend['name'], depth, now)
+        now += seconds
+        busy += seconds
+        fetched, missed, requests = fetched + len(tweets), missed + lost, requests + calls
+        scheduler.record(trend, tweets, depth, seconds, calls, now)
+    return fetched, missed, busy, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--trends', type=int, default=30)
+    parser.add_argument('--hours', type=float, default=6)
+    parser.add_argument('--budget', type=int, default=None,
+                        help="requests per hour for the adaptive scheduler (default: the fixed cycle's rate)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    duration = args.hours * 3600
+    print(f"{'policy':<12}{'fresh/hour':>12}{'missed/hour':>13}{'browser %':>11}{'requests/hour':>15}"
+          f"{'tweets/browser s':>18}")
+    fixed = run_fixed(SimulatedTrends(args.trends, args.seed), duration)
+    budget = args.budget or int(fixed[3] / args.hours)
+    adaptive = run_adaptive(SimulatedTrends(args.trends, args.seed), duration, budget)
+    for name, (fetched, missed, busy, requests) in (('fixed', fixed), ('adaptive', adaptive)):
+        print(f"{name:<12}{fetched / args.hours:>12.0f}{missed / args.hours:>13.0f}{100 * busy / duration:>11.0f}"
+              f"{requests / args.hours:>15.0f}{fetched / busy:>18.2f}")
+    print(f"adaptive budget: {budget} requests/hour")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Time virality scoring on a synthetic tweet store.
+
+Generates --rows typed tweets (default 10M) spread over --trends trends and
+--days days, then times a full scoring pass and an incremental update with a
+--batch sized batch of new tweets.
+
+    python Benchmarks/bench_virality.py [--rows 10000000] [--trends 500] [--days 7] [--batch 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Analysis'))
+from virality import ViralityScorer  # noqa: E402
+
+
+def synthetic_tweets(rows, trends, days, start, rng):
+    """Typed tweets with heavy-tailed engagement and a few trends that spike"""
+    names = np.array([f'trend_{i}' for i in range(trends)])
+    # Zipf-ish popularity so some trends dominate, like the real trending page
+    weights = 1 / np.arange(1, trends + 1)
+    trend = rng.choice(trends, size=rows, p=weights / weights.sum())
+    date = start + rng.integers(0, days * 86400, size=rows)
+    likes = rng.pareto(1.5, size=rows).astype(np.int64) * 10
+    return pd.DataFrame({
+        'trend': pd.Categorical.from_codes(trend, categories=names),
+        'date': pd.array(date, dtype='Int64'),
+        'likes': likes,
+        'retweets': likes // 7,
+        'replies': likes // 11,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--trends', type=int, default=500)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--batch', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = 1_747_000_000
+    t = time.perf_counter()
+    tweets = synthetic_tweets(args.rows, args.trends, args.days, start, rng)
+    print(f"generated {args.rows:,} tweets in {time.perf_counter() - t:.2f}s "
+          f"({tweets.memory_usage(deep=True).sum() / 2**20:.0f} MiB)")
+
+    scorer = ViralityScorer()
+    t = time.perf_counter()
+    scorer.update(tweets)
+    elapsed = time.perf_counter() - t
+    print(f"full scoring: {elapsed:.2f}s ({args.rows / elapsed / 1e6:.1f}M tweets/s), "
+          f"{len(scorer.scores):,} trend-buckets")
+
+    batch = synthetic_tweets(args.batch, args.trends, 1, start + args.days * 86400, rng)
+    t = time.perf_counter()
+    scorer.update(batch)
+    print(f"incremental update of {args.batch:,} tweets: {time.perf_counter() - t:.2f}s")
+    print(scorer.latest(5)[['trend', 'time', 'engagement_velocity', 'acceleration', 'virality']].to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
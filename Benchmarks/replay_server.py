@@ -0,0 +1,212 @@
+"""Local stand-in for x.com that replays recorded pages.
+
+Serves the trending page, live search results and profiles built from a
+recorded fixture (fixtures/replay.json). Timelines scroll infinitely: the page
+holds the first batch of articles, and scrolling to the bottom fetches the next
+batch from /timeline, so scraping sees the same incremental rendering as on
+the real site. /home always looks logged in.
+
+Point a scraper at it with TwitterScraper(..., driver=driver, base_url=server.base_url),
+or run it on its own:
+
+    python Benchmarks/replay_server.py [--port 8000] [--repeat 10] [--batch 5] [--latency 0.05]
+"""
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'replay.json')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>{title} / X</title>
+  <style>article {{ min-height: 320px; border-bottom: 1px solid #ccc; }}</style>
+</head>
+<body>
+  <nav><a data-testid="AppTabBar_Home_Link" href="/home">Home</a></nav>
+  <main role="main">
+    <section aria-labelledby="timeline">
+{body}
+    </section>
+  </main>
+{script}
+</body>
+</html>
+"""
+
+# Fetches the next batch once the user scrolls near the bottom, like the real timeline
+SCROLL_SCRIPT = """  <script>
+    let cursor = {cursor};
+    let loading = cursor === null;
+    window.addEventListener('scroll', () => {{
+      if (loading || window.innerHeight + window.scrollY < document.body.scrollHeight - 400) return;
+      loading = true;
+      fetch('/timeline?{query}&cursor=' + cursor).then(r => r.json()).then(page => {{
+        document.querySelector('section').insertAdjacentHTML('beforeend', page.html);
+        cursor = page.next;
+        loading = cursor === null;
+      }});
+    }});
+  </script>"""
+
+ARTICLE_TEMPLATE = """    <article data-testid="tweet" role="article">
+      <div data-testid="User-Name"><span>{username}</span><br><span>@{handle}</span></div>
+      <a href="/{handle}/status/{status_id}"><time datetime="{date}">May 21</time></a>
+      <div data-testid="tweetText" lang="en">{content}</div>
+      <div role="group">
+        <div data-testid="reply-count">{replies}</div>
+        <div data-testid="retweet-count">{retweets}</div>
+        <div data-testid="like-count">{likes}</div>
+      </div>
+    </article>"""
+
+TREND_TEMPLATE = """    <div data-testid="trend"><div>{rank} · Trending</div><div>{name}</div><div>{posts} posts</div></div>"""
+
+
+def load_fixture(path=FIXTURE, repeat=1):
+    """Load a recorded fixture, optionally repeating every tweet so timelines run deeper.
+
+    Repeats get older status ids and a numbered suffix, so they are distinct
+    tweets to the scraper's dedup.
+    """
+    with open(path, encoding='utf-8') as f:
+        fixture = json.load(f)
+    tweets = []
+    for n in range(repeat):
+        for tweet in fixture['tweets']:
+            copy = dict(tweet)
+            if n:
+                copy['status_id'] = str(int(tweet['status_id']) - n * 1000)
+                copy['content'] = f"{tweet['content']} ({n})"
+            tweets.append(copy)
+    # Newest first, as on a live timeline
+    tweets.sort(key=lambda t: int(t['status_id']), reverse=True)
+    fixture['tweets'] = tweets
+    return fixture
+
+
+def render_articles(tweets):
+    return '\n'.join(ARTICLE_TEMPLATE.format(**{
+        key: html.escape(str(value or '')) for key, value in tweet.items()
+    }) for tweet in tweets)
+
+
+class ReplayServer:
+    """Threaded HTTP server replaying a fixture; use as a context manager or start()/stop()"""
+
+    def __init__(self, fixture=None, host='127.0.0.1', port=0, batch=5, latency=0.0):
+        self.fixture = fixture if fixture is not None else load_fixture()
+        self.batch = batch
+        self.latency = latency  # Seconds added to every timeline fetch, standing in for the network
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def timeline(self, params):
+        """Tweets of a search (?q=trend) or profile (?user=handle) timeline"""
+        if 'q' in params:
+            return [t for t in self.fixture['tweets'] if t['trend'] == params['q']]
+        return [t for t in self.fixture['tweets'] if t['handle'].lower() == params.get('user', '').lower()]
+
+    def timeline_page(self, title, params):
+        tweets = self.timeline(params)
+        query = '&'.join(f"{key}={quote(value)}" for key, value in params.items())
+        cursor = self.batch if len(tweets) > self.batch else 'null'
+        return PAGE_TEMPLATE.format(title=html.escape(title), body=render_articles(tweets[:self.batch]),
+                                    script=SCROLL_SCRIPT.format(cursor=cursor, query=query))
+
+    def trending_page(self):
+        body = '\n'.join(TREND_TEMPLATE.format(rank=rank, name=html.escape(trend['name']), posts=trend['posts'])
+                         for rank, trend in enumerate(self.fixture['trends'], 1))
+        return PAGE_TEMPLATE.format(title='Explore', body=body, script='')
+
+    def route(self, path, params):
+        """Return (status, content type, body) for a request"""
+        if path in ('', '/', '/home'):
+            return 200, 'text/html', PAGE_TEMPLATE.format(title='Home', body='', script='')
+        if path == '/explore/tabs/trending':
+            return 200, 'text/html', self.trending_page()
+        if path == '/search':
+            return 200, 'text/html', self.timeline_page(params.get('q', ''), {'q': params.get('q', '')})
+        if path == '/timeline':
+            time.sleep(self.latency)
+            tweets = self.timeline({key: value for key, value in params.items() if key in ('q', 'user')})
+            cursor = int(params.get('cursor', 0))
+            end = cursor + self.batch
+            page = {'html': render_articles(tweets[cursor:end]), 'next': end if end < len(tweets) else None}
+            return 200, 'application/json', json.dumps(page)
+        handle = path.strip('/')
+        if handle and '/' not in handle and self.timeline({'user': handle}):
+            return 200, 'text/html', self.timeline_page(handle, {'user': handle})
+        return 404, 'text/html', PAGE_TEMPLATE.format(title='Page not found', body='', script='')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                status, content_type, body = server.route(url.path, params)
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--fixture', default=FIXTURE)
+    parser.add_argument('--repeat', type=int, default=10, help='copies of each recorded tweet, for deeper timelines')
+    parser.add_argument('--batch', type=int, default=5, help='articles per page load / scroll')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to each scroll fetch')
+    args = parser.parse_args()
+
+    server = ReplayServer(load_fixture(args.fixture, args.repeat), port=args.port, batch=args.batch,
+                          latency=args.latency)
+    print(f"Replaying {len(server.fixture['tweets'])} tweets at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from jsonlog import configure_logging
+from metrics import MetricsFileWriter, serve_prometheus
+from seen_index import SeenIndex
+from storage import CSVSink
+from twitter import TwitterScraper
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTwitterScraper:
+    """Asyncio front end for a TwitterScraper.
+
+    Every WebDriver call runs in a thread executor and every politeness delay is
+    an ``await asyncio.sleep``, so the event loop is free while a session is
+    waiting. One process can then drive several sessions and run background
+    work (storage flushes, stats) in the gaps.
+    """
+
+    def __init__(self, scraper, executor=None):
+        self.scraper = scraper
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def driver(self):
+        return self.scraper.driver
+
+    async def call(self, fn, *args, **kwargs):
+        """Run a blocking browser call in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def sleep(self, min_seconds=2, max_seconds=5):
+        """Wait a random amount of time without blocking the event loop"""
+        await asyncio.sleep(random.uniform(min_seconds, max_seconds))
+
+    async def jitter(self):
+        """Short politeness pause, using the same range as the scraper's Pacer"""
+        await self.sleep(*self.scraper.pacer.jitter_range)
+
+    async def ensure_session(self):
+        """Check the session (and log in again if needed) off the event loop"""
+        return await self.call(self.scraper.ensure_session)
+
+    async def simulate_human_behavior(self):
+        """Scroll a little with awaited pauses"""
+        try:
+            for _ in range(random.randint(1, 3)):
+                await self.call(self.driver.execute_script, f"window.scrollBy(0, {random.randint(100, 300)});")
+                await self.jitter()
+        except Exception as e:
+            logger.warning(f"Error in human behavior simulation: {str(e)}")
+
+    async def scroll_and_extract_tweets(self, max_tweets=20, incremental=True, max_idle_scrolls=1, since_id=None):
+        """Scroll the current page and extract tweets newer than since_id, like the blocking loop.
+
+        Each iteration is one TwitterScraper.scroll_step in the executor; the
+        human-behavior pauses and the pause after an error are awaited.
+        """
+        scraper = self.scraper
+        with scraper.metrics.timer('scraper_stage_seconds', stage='scroll_and_extract'):
+            state = await self.call(scraper.start_scroll, max_tweets, incremental, max_idle_scrolls, since_id)
+            while not state.finished:
+                try:
+                    await self.call(scraper.scroll_step, state)
+                    if not state.stopped:
+                        await self.simulate_human_behavior()
+                except Exception as e:
+                    if not scraper.scroll_error(state, e):
+                        break
+                    await asyncio.sleep(30)
+                    if not await self.call(scraper.reopen_page, state):
+                        break
+        return state.tweets
+
+    async def get_trend_list(self):
+        """Read the trending page once and return the trend list"""
+        return await self.call(self.scraper.get_trend_list)
+
+    async def scrape_trend(self, trend, max_tweets=5, filename=None):
+        """Open a trend's live search page, scrape it and save the tweets"""
+        try:
+            started, duplicates = await self.call(self.scraper.open_trend, trend)
+            await self.jitter()
+            tweets = await self.scroll_and_extract_tweets(max_tweets, since_id=self.scraper.since(trend['name']))
+            # Saving writes to disk and advancing the checkpoint fsyncs, so both stay off the event loop
+            await self.call(self.scraper.finish_trend, trend, tweets, started, duplicates, filename)
+            return tweets
+        except Exception as e:
+            logger.warning(f"Error scraping trend {trend['name']}: {str(e)}")
+            self.scraper.count_error('scrape_trend')
+            return []
+
+    async def get_trending_tweets(self, max_tweets_per_trend=5, trends=None):
+        """Scrape every trend once, awaiting the politeness delay between trends"""
+        if trends is None:
+            trends = await self.get_trend_list()
+        tweets = []
+        for trend in trends:
+            tweets.extend(await self.scrape_trend(trend, max_tweets_per_trend))
+            await self.jitter()
+        return tweets
+
+    async def close(self):
+        """Close the underlying scraper and its executor"""
+        await self.call(self.scraper.close)
+        self.executor.shutdown(wait=False)
+
+
+async def flush_storage(sink, seen_index):
+    """Flush shared storage in a worker thread, so the disk writes don't block the event loop"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, sink.flush)
+    await loop.run_in_executor(None, seen_index.flush)
+
+
+async def flush_periodically(sink, seen_index, interval=15):
+    """Background task that flushes shared storage while sessions are waiting"""
+    while True:
+        await asyncio.sleep(interval)
+        await flush_storage(sink, seen_index)
+
+
+async def run_sessions(sessions, max_tweets_per_trend=5, cycle_delay=300):
+    """Drive several sessions from one event loop, splitting each cycle's trends between them"""
+    sink = sessions[0].scraper.sink
+    seen_index = sessions[0].scraper.seen_index
+    flusher = asyncio.create_task(flush_periodically(sink, seen_index))
+    try:
+        while True:
+            ready = [s for s, ok in zip(sessions, await asyncio.gather(*(s.ensure_session() for s in sessions))) if ok]
+            if not ready:
+                logger.error("No session could log in. Retrying in 60 seconds...")
+                await asyncio.sleep(60)
+                continue
+
+            # Read the trend list once and deal the trends out round-robin
+            trends = await ready[0].get_trend_list()
+            shares = [trends[i::len(ready)] for i in range(len(ready))]
+            results = await asyncio.gather(*(
+                s.get_trending_tweets(max_tweets_per_trend, trends=share) for s, share in zip(ready, shares)
+            ))
+            logger.info(f"Collected {sum(len(r) for r in results)} tweets with {len(ready)} sessions")
+
+            await flush_storage(sink, seen_index)
+            logger.info(f"Completed one cycle. Waiting {cycle_delay} seconds before starting next cycle...")
+            await asyncio.sleep(cycle_delay)
+    finally:
+        flusher.cancel()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+async def main(num_sessions=2, max_tweets_per_trend=5):
+    os.makedirs("data/raw", exist_ok=True)
+    sink = CSVSink()
+    seen_index = SeenIndex()
+
+    # Launching Chrome blocks, so each launch runs in the session's executor thread. Launches
+    # go one at a time (they patch a shared chromedriver binary); run_sessions logs in in parallel
+    sessions = [AsyncTwitterScraper(None) for _ in range(num_sessions)]
+    for i, session in enumerate(sessions):
+        session.scraper = await session.call(TwitterScraper, "", "", sink=sink, seen_index=seen_index,
+                                             profile_dir=f"data/session/profile_{i}")
+    await run_sessions(sessions, max_tweets_per_trend)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape trending topics from several sessions in one event loop")
+    parser.add_argument('--sessions', type=int, default=2)
+    parser.add_argument('--max-tweets-per-trend', type=int, default=5)
+    parser.add_argument('--metrics-port', type=int, default=None, help='serve Prometheus metrics on this port')
+    parser.add_argument('--metrics-file', default="data/metrics/scraper.json")
+    parser.add_argument('--log-file', default="data/logs/scraper.jsonl", help='JSON-lines log file')
+    args = parser.parse_args()
+    configure_logging(args.log_file)
+    if args.metrics_port:
+        serve_prometheus(args.metrics_port)
+    metrics_writer = MetricsFileWriter(args.metrics_file).start()
+    try:
+        asyncio.run(main(args.sessions, args.max_tweets_per_trend))
+    except KeyboardInterrupt:
+        logger.info("Received termination signal. Cleaning up...")
+    finally:
+        metrics_writer.stop()
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def status_id_of(tweet):
+    """Numeric status id of a tweet dict, or None if it has none"""
+    value = tweet.get('status_id')
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CrawlCheckpoint:
+    """Resumable crawl state, saved atomically after every unit of work.
+
+    Holds the trend list of the cycle in progress, the index of the next trend
+    to scrape, and the highest status id collected per trend name or '@user'
+    profile. Status ids are snowflakes and grow with time, so "newer than the
+    checkpoint" is a plain integer comparison. The adaptive scheduler keeps its
+    trend estimates here too, as an opaque dict.
+    """
+
+    def __init__(self, path="data/session/checkpoint.json"):
+        self.path = path
+        self.trends = []
+        self.index = 0
+        self.last_seen = {}
+        self.scheduler = {}
+        self.updated = None
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Read the saved state, starting fresh if there is none or it is unreadable"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return
+        with self._lock:
+            self.trends = state.get('trends', [])
+            self.index = state.get('index', 0)
+            self.last_seen = {key: int(value) for key, value in state.get('last_seen', {}).items()}
+            self.scheduler = state.get('scheduler', {})
+            self.updated = state.get('updated')
+
+    def save(self):
+        """Write the state to a temporary file and rename it over the checkpoint"""
+        with self._lock:
+            self.updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            state = {
+                'trends': self.trends,
+                'index': self.index,
+                # Strings, since snowflake ids don't survive a round-trip through JS-style JSON readers
+                'last_seen': {key: str(value) for key, value in self.last_seen.items()},
+                'scheduler': self.scheduler,
+                'updated': self.updated,
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    @property
+    def in_progress(self):
+        """True if a saved cycle still has trends left to scrape"""
+        return self.index < len(self.trends)
+
+    def pending(self):
+        """The trends of the current cycle that have not been scraped yet"""
+        with self._lock:
+            return self.trends[self.index:]
+
+    def start_cycle(self, trends):
+        with self._lock:
+            self.trends = list(trends)
+            self.index = 0
+            self.save()
+
+    def since(self, key):
+        """Highest status id already collected for a trend name or '@user', or None"""
+        with self._lock:
+            return self.last_seen.get(key)
+
+    def record(self, key, tweets):
+        """Advance the last seen status id of key past the given tweets"""
+        ids = [i for i in map(status_id_of, tweets) if i is not None]
+        if not ids:
+            return
+        with self._lock:
+            self.last_seen[key] = max(self.last_seen.get(key, 0), max(ids))
+
+    def forget(self, keys):
+        """Drop the last seen status ids of trends or profiles that are no longer crawled"""
+        with self._lock:
+            for key in keys:
+                self.last_seen.pop(key, None)
+
+    def complete(self, key, tweets):
+        """Record a finished trend or profile, move past it in the cycle and save"""
+        with self._lock:
+            self.record(key, tweets)
+            names = [trend.get('name') for trend in self.trends[self.index:]]
+            if key in names:
+                # Trends that failed before this one are not retried until the next cycle
+                self.index += names.index(key) + 1
+            self.save()
+
+    def save_scheduler(self, state):
+        """Store the adaptive scheduler's state and save"""
+        with self._lock:
+            self.scheduler = state
+            self.save()
+
+    def finish_cycle(self):
+        with self._lock:
+            self.trends = []
+            self.index = 0
+            self.save()
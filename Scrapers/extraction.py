@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+TWEET_SELECTOR = 'article[data-testid="tweet"]'
+
+# Reads every tweet article on the page in one WebDriver round-trip. Mirrors the
+# per-element lookups TwitterScraper used to do: User-Name, tweetText, the <time>
+# element (and the status permalink on its parent anchor) and the *-count metrics.
+# Articles whose status id is in arguments[1] are skipped before any field is read.
+EXTRACT_TWEETS_JS = """
+const limit = arguments[0];
+const skip = new Set(arguments[1] || []);
+const articles = document.querySelectorAll('article[data-testid="tweet"]');
+const results = [];
+for (const article of articles) {
+    if (limit !== null && results.length >= limit) break;
+    const tweet = {username: null, content: null, date: null,
+                   likes: null, retweets: null, replies: null, status_id: null};
+    const time = article.querySelector('time');
+    if (time) {
+        const link = time.closest('a');
+        const match = link ? (link.getAttribute('href') || '').match(/\\/status\\/(\\d+)/) : null;
+        if (match) tweet.status_id = match[1];
+        if (tweet.status_id !== null && skip.has(tweet.status_id)) continue;
+        tweet.date = time.getAttribute('datetime');
+    }
+    const user = article.querySelector('div[data-testid="User-Name"]');
+    if (user) tweet.username = user.innerText.split('\\n')[0];
+    const text = article.querySelector('div[data-testid="tweetText"]');
+    if (text) tweet.content = text.innerText;
+    for (const metric of article.querySelectorAll('div[data-testid$="-count"]')) {
+        const type = metric.getAttribute('data-testid') || '';
+        if (type.includes('like')) tweet.likes = metric.innerText;
+        else if (type.includes('retweet')) tweet.retweets = metric.innerText;
+        else if (type.includes('reply')) tweet.replies = metric.innerText;
+    }
+    results.push(tweet);
+}
+return results;
+"""
+
+
+def extract_tweets(driver, limit=None, default_metric=None, skip_ids=None):
+    """Extract all tweet articles on the current page with a single execute_script call.
+
+    Articles whose status id is in skip_ids are left out, so repeated calls on a
+    growing timeline only transfer the articles that appeared since the last call.
+    """
+    raw_tweets = driver.execute_script(EXTRACT_TWEETS_JS, limit, list(skip_ids or [])) or []
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    tweets = []
+    for raw in raw_tweets:
+        tweet_data = {
+            'username': raw.get('username'),
+            'content': raw.get('content'),
+            'date': raw.get('date'),
+            'likes': raw.get('likes'),
+            'retweets': raw.get('retweets'),
+            'replies': raw.get('replies'),
+            'timestamp': timestamp,
+            'status_id': raw.get('status_id'),
+        }
+        for metric in ('likes', 'retweets', 'replies'):
+            if tweet_data[metric] is None:
+                tweet_data[metric] = default_metric
+        tweets.append(tweet_data)
+    return tweets
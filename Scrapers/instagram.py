@@ -0,0 +1,340 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import instaloader
+from instaloader import FrozenNodeIterator, resumable_iteration
+
+from storage import CSVSink
+from seen_index import SeenIndex, tweet_key
+from metrics import REGISTRY, timed
+from checkpoint import CrawlCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second on average, bursts of up to capacity.
+
+    Share one bucket between every scraper that uses the same account or IP so
+    their combined request rate stays under the limit.
+    """
+
+    def __init__(self, rate=0.2, capacity=10):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available and take them; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class BucketRateController(instaloader.RateController):
+    """Instaloader rate controller that also takes a token from a shared TokenBucket before every query"""
+
+    def __init__(self, context, bucket):
+        super().__init__(context)
+        self.bucket = bucket
+
+    def wait_before_query(self, query_type):
+        waited = self.bucket.acquire()
+        if waited:
+            REGISTRY.observe('pacer_wait_seconds', waited, wait='instagram_rate_limit', outcome='ok')
+        super().wait_before_query(query_type)
+
+
+def post_to_tweet(post, trend=None):
+    """Map an Instaloader Post onto the tweet storage schema"""
+    return {
+        'username': post.owner_username,
+        'content': post.caption or '',
+        'date': post.date_utc.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'likes': post.likes,
+        'retweets': 0,  # Instagram has no public share count
+        'replies': post.comments,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'status_id': str(post.mediaid),
+        'trend': trend,
+    }
+
+
+def _load_frozen(context, path):
+    with open(path) as f:
+        return FrozenNodeIterator(**json.load(f))
+
+
+def _save_frozen(frozen, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(frozen._asdict(), f)
+    os.replace(tmp_path, path)
+
+
+class InstagramScraper:
+    """Collects hashtag and profile posts with Instaloader into the same storage as TwitterScraper.
+
+    Posts are pulled page by page from Instaloader's NodeIterators and saved in
+    batches of batch_size. Every GraphQL query first takes a token from a shared
+    TokenBucket, so several scrapers in one process stay within one rate. Deep
+    hashtag crawls (backfill=True) save the iterator position and resume there
+    on the next call; regular calls only collect posts newer than the checkpoint.
+    """
+
+    def __init__(self, username=None, password=None, sink=None, seen_index=None, rate_limiter=None,
+                 session_dir="data/session", resume_dir="data/session/instagram_resume", batch_size=50,
+                 checkpoint=None, listeners=None, metrics=None):
+        self.username = username
+        self.password = password
+        self.sink = sink or CSVSink()
+        self.seen_index = seen_index if seen_index is not None else SeenIndex()
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.session_dir = session_dir
+        self.resume_dir = resume_dir
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.listeners = list(listeners or [])
+        self.metrics = metrics or REGISTRY
+        self.current_trend = None
+        # Metadata only: nothing is downloaded to disk besides our own storage
+        self.loader = instaloader.Instaloader(
+            quiet=True,
+            download_pictures=False,
+            download_videos=False,
+            download_video_thumbnails=False,
+            download_geotags=False,
+            download_comments=False,
+            save_metadata=False,
+            compress_json=False,
+            rate_controller=lambda context: BucketRateController(context, self.rate_limiter),
+        )
+
+    @property
+    def session_path(self):
+        return os.path.join(self.session_dir, f"instagram_{self.username}.session")
+
+    @timed('login')
+    def login(self):
+        """Log in with the password and save the session file for later runs"""
+        try:
+            logger.info(f"Logging in to Instagram as {self.username}")
+            self.metrics.inc('scraper_logins_total')
+            self.loader.login(self.username, self.password)
+            os.makedirs(self.session_dir, exist_ok=True)
+            self.loader.save_session_to_file(self.session_path)
+            logger.info(f"Saved Instagram session to {self.session_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Instagram login failed: {str(e)}")
+            self.metrics.inc('scraper_errors_total', stage='login', trend='')
+            return False
+
+    @timed('ensure_session')
+    def ensure_session(self):
+        """Reuse the saved session file if it is still valid, only logging in if it isn't"""
+        if not self.username:
+            logger.info("No Instagram account configured, scraping anonymously")
+            return True
+        if os.path.exists(self.session_path):
+            try:
+                self.loader.load_session_from_file(self.username, self.session_path)
+                if self.loader.test_login() == self.username:
+                    logger.info("Restored Instagram session from file")
+                    return True
+            except Exception as e:
+                logger.warning(f"Error loading Instagram session: {str(e)}")
+        return self.login()
+
+    def save_tweets_to_csv(self, tweets, filename):
+        """Append posts to the storage backend, skipping ones already stored"""
+        try:
+            if not tweets:
+                return
+            saved = self.sink.write(tweets, filename)
+            fresh = [t for t in tweets if self.seen_index.add(*tweet_key(t))]
+            self.metrics.inc('scraper_tweets_saved_total', saved, trend=self.current_trend or '')
+            logger.info(f"Successfully saved {saved} posts to {filename}")
+            for listener in self.listeners:
+                try:
+                    listener(fresh)
+                except Exception as e:
+                    logger.warning(f"Error in tweet listener: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error saving posts: {str(e)}")
+            self.metrics.inc('scraper_errors_total', stage='save', trend=self.current_trend or '')
+
+    def iter_batches(self, posts, key, max_posts, trend=None, backfill=False):
+        """Yield lists of up to batch_size new posts (as tweet dicts) from a NodeIterator.
+
+        Stops after max_posts new posts. Without backfill, also stops at the first
+        post at or below the checkpointed media id for key. With backfill, the
+        iterator position is saved when max_posts is reached (or the crawl is
+        interrupted) and the next call for the same iterator resumes from it.
+        """
+        since = None if backfill or not self.checkpoint else self.checkpoint.since(key)
+        batch = []
+        collected = 0
+        stopped_early = False
+        with resumable_iteration(
+            context=self.loader.context,
+            iterator=posts,
+            load=_load_frozen,
+            save=_save_frozen,
+            format_path=lambda magic: self._resume_path(key, magic),
+            enabled=backfill,
+        ) as (is_resuming, start_index):
+            if is_resuming:
+                logger.info(f"Resuming {key} at post {start_index}")
+            for post in posts:
+                if since is not None and post.mediaid <= since:
+                    # Profiles yield pinned posts first, whatever their age, so only a regular
+                    # post this old means the rest of the feed was collected already
+                    if post.is_pinned:
+                        continue
+                    logger.info(f"Reached posts collected in an earlier run for {key}, stopping")
+                    break
+                tweet = post_to_tweet(post, trend)
+                if self.seen_index.seen(tweet):
+                    self.metrics.inc('scraper_duplicates_total', trend=self.current_trend or '')
+                    continue
+                batch.append(tweet)
+                collected += 1
+                self.metrics.inc('scraper_tweets_extracted_total', trend=self.current_trend or '')
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+                if collected >= max_posts:
+                    stopped_early = True
+                    break
+            if batch:
+                yield batch
+        if backfill and stopped_early:
+            # resumable_iteration only saves on interruption, so keep the position for the next call too
+            os.makedirs(self.resume_dir, exist_ok=True)
+            _save_frozen(posts.freeze(), self._resume_path(key, posts.magic))
+
+    def _resume_path(self, key, magic):
+        safe_key = ''.join(c if c.isalnum() else '_' for c in key)
+        return os.path.join(self.resume_dir, f"{safe_key}_{magic}.json")
+
+    def _collect(self, posts, key, max_posts, trend=None, backfill=False):
+        """Save every batch as it arrives and return all collected posts"""
+        self.current_trend = key
+        filename = self.sink.path_for(datetime.now().strftime("%Y%m%d"))
+        collected = []
+        for batch in self.iter_batches(posts, key, max_posts, trend, backfill):
+            self.save_tweets_to_csv(batch, filename)
+            collected.extend(batch)
+            if self.checkpoint:
+                # Get the batch to disk before the checkpoint moves past it
+                self.sink.flush()
+                self.seen_index.flush()
+                self.checkpoint.complete(key, batch)
+        return collected
+
+    @timed('hashtag_posts')
+    def get_hashtag_posts(self, hashtag, max_posts=50, backfill=False):
+        """Collect recent posts of a hashtag; backfill=True walks the hashtag deeper on every call"""
+        hashtag = hashtag.lstrip('#')
+        try:
+            logger.info(f"Fetching posts for #{hashtag}")
+            posts = instaloader.Hashtag.from_name(self.loader.context, hashtag).get_posts_resumable()
+            tweets = self._collect(posts, f"#{hashtag}", max_posts, trend=f"#{hashtag}", backfill=backfill)
+            logger.info(f"Collected {len(tweets)} posts for #{hashtag}")
+            return tweets
+        except Exception as e:
+            logger.warning(f"Error fetching posts for #{hashtag}: {str(e)}")
+            self.metrics.inc('scraper_errors_total', stage='hashtag_posts', trend=f"#{hashtag}")
+            return []
+
+    @timed('user_tweets')
+    def get_user_posts(self, username, max_posts=20):
+        """Collect the newest posts from a user's profile"""
+        try:
+            logger.info(f"Fetching posts from @{username}'s profile")
+            profile = instaloader.Profile.from_username(self.loader.context, username)
+            tweets = self._collect(profile.get_posts(), f"@{username}", max_posts)
+            logger.info(f"Collected {len(tweets)} posts from @{username}")
+            return tweets
+        except Exception as e:
+            logger.error(f"Error fetching posts for @{username}: {str(e)}")
+            self.metrics.inc('scraper_errors_total', stage='user_tweets', trend=f"@{username}")
+            return []
+
+    @timed('trending_cycle')
+    def get_trending_posts(self, hashtags, max_posts_per_tag=50, backfill=False):
+        """Collect posts for each hashtag in turn (Instagram has no public trending list)"""
+        posts = []
+        for i, hashtag in enumerate(hashtags):
+            logger.info(f"Hashtag {i+1}/{len(hashtags)}: {hashtag}")
+            posts.extend(self.get_hashtag_posts(hashtag, max_posts_per_tag, backfill))
+        self.sink.flush()
+        self.seen_index.flush()
+        if posts:
+            logger.info(f"Successfully fetched and saved {len(posts)} posts from {len(hashtags)} hashtags")
+        else:
+            logger.warning("No posts collected from hashtags")
+        return posts
+
+    def close(self):
+        """Flush pending posts and close the Instaloader session"""
+        try:
+            self.sink.close()
+            self.seen_index.close()
+        except Exception as e:
+            logger.error(f"Error flushing posts: {str(e)}")
+        self.loader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect Instagram hashtag and profile posts")
+    parser.add_argument('--username', default=None)
+    parser.add_argument('--password', default=None)
+    parser.add_argument('--hashtags', nargs='*', default=[])
+    parser.add_argument('--profiles', nargs='*', default=[])
+    parser.add_argument('--max-posts', type=int, default=50)
+    parser.add_argument('--backfill', action='store_true', help='walk hashtags deeper on every cycle')
+    parser.add_argument('--rate', type=float, default=0.2, help='GraphQL queries per second')
+    parser.add_argument('--cycle-delay', type=float, default=300)
+    args = parser.parse_args()
+
+    os.makedirs("data/raw", exist_ok=True)
+    scraper = InstagramScraper(args.username, args.password, rate_limiter=TokenBucket(args.rate),
+                               checkpoint=CrawlCheckpoint("data/session/instagram_checkpoint.json"))
+    try:
+        while True:
+            if not scraper.ensure_session():
+                logger.error("Failed to login. Retrying in 60 seconds...")
+                time.sleep(60)
+                continue
+            scraper.get_trending_posts(args.hashtags, args.max_posts, args.backfill)
+            for profile in args.profiles:
+                scraper.get_user_posts(profile, args.max_posts)
+            logger.info(f"Completed one cycle. Waiting {args.cycle_delay:.0f} seconds before starting next cycle...")
+            time.sleep(args.cycle_delay)
+    except KeyboardInterrupt:
+        logger.info("Received termination signal. Cleaning up...")
+    finally:
+        scraper.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
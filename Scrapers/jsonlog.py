@@ -0,0 +1,149 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through extra= and is a structured field
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def fields_of(record):
+    """The extra= fields attached to a record"""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(fields_of(record))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() renders the message in the logging thread so records
+    can be pickled; this queue never leaves the process, so the record is
+    passed through as is and the scraping thread only pays for the enqueue.
+    Log arguments should therefore be values that are not mutated afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class VolumeFilter(logging.Filter):
+    """Sample and rate-limit records before they are queued.
+
+    Structured records (those with an 'event' extra field) are sampled:
+    sample maps an event name to the fraction of its records to keep, and
+    WARNING and above are always kept. Free-text records below WARNING are
+    rate-limited per message template to `burst` records per `interval`
+    seconds; the number dropped is attached to the next record of that
+    template that gets through as a 'suppressed' field. Warnings and errors
+    are never dropped.
+    """
+
+    def __init__(self, sample=None, burst=60, interval=60.0):
+        super().__init__()
+        self.sample = dict(sample or {})
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}  # (logger, template) -> [window start, records passed, records suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event is not None:
+            rate = self.sample.get(event)
+            return rate is None or record.levelno >= logging.WARNING or random.random() < rate
+        if not self.burst or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            if len(self._windows) > 10000:
+                # f-string messages make a new template per call; forget the expired ones
+                self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.interval}
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+def configure_logging(json_path="data/logs/scraper.jsonl", level=logging.INFO, console=True, sample=None,
+                      burst=60, interval=60.0):
+    """Route the root logger through a queue to a console and/or JSON-lines file handler.
+
+    Replaces any handlers set up by basicConfig. Formatting and I/O happen on
+    the QueueListener's thread, which is stopped (and the queue drained) at
+    exit. Returns the listener.
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(stream)
+    if json_path:
+        directory = os.path.dirname(json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        json_handler = logging.handlers.RotatingFileHandler(json_path, maxBytes=50 * 2**20, backupCount=5,
+                                                            encoding='utf-8')
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+
+    records = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(records)
+    queue_handler.addFilter(VolumeFilter(sample, burst, interval))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def stop_logging():
+    """Flush queued records and stop the listener thread, if configure_logging started one"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
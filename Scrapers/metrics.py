@@ -0,0 +1,187 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """Thread-safe counters and histograms, keyed by metric name and labels.
+
+    Exposed in Prometheus text format (render_prometheus) or as a dict for
+    JSON (to_dict). A single shared REGISTRY is used unless one is passed in.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}  # name -> {label key: value}
+        self.histograms = {}  # name -> {label key: [bucket counts..., sum, count]}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record one observation (e.g. a duration in seconds) in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Context manager observing the block's duration in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self.counters.get(name, {}).get(_label_key(labels), 0)
+
+    def to_dict(self):
+        """Snapshot of every series, for the JSON metrics file"""
+        with self._lock:
+            counters = {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                        for name, series in self.counters.items()}
+            histograms = {
+                name: [{'labels': dict(key), 'count': state[-1], 'sum': state[-2],
+                        'buckets': dict(zip(map(str, self.buckets), state[:-2]))}
+                       for key, state in series.items()]
+                for name, series in self.histograms.items()
+            }
+        return {'time': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f'# TYPE {name} counter')
+                lines.extend(f'{name}{_format_labels(key)} {value}' for key, value in series.items())
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f'# TYPE {name} histogram')
+                for key, state in series.items():
+                    for bound, count in zip(self.buckets, state):
+                        lines.append(f'{name}_bucket{_format_labels(key, [("le", bound)])} {count}')
+                    lines.append(f'{name}_bucket{_format_labels(key, [("le", "+Inf")])} {state[-1]}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {state[-2]}')
+                    lines.append(f'{name}_count{_format_labels(key)} {state[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+REGISTRY = Metrics()
+
+
+def timed(stage, name='scraper_stage_seconds'):
+    """Method decorator timing each call into self.metrics (or REGISTRY) under stage=..."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None) or REGISTRY
+            with metrics.timer(name, stage=stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsFileWriter:
+    """Background thread writing a JSON snapshot of the metrics every interval seconds"""
+
+    def __init__(self, path="data/metrics/scraper.json", interval=60, metrics=None):
+        self.path = path
+        self.interval = interval
+        self.metrics = metrics or REGISTRY
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        """Write a snapshot now, atomically replacing the previous one"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.metrics.to_dict(), f)
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.warning(f"Error writing metrics file: {str(e)}")
+
+
+def serve_prometheus(port=9108, host='0.0.0.0', metrics=None):
+    """Serve /metrics in Prometheus text format from a daemon thread; returns the server"""
+    metrics = metrics or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            data = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
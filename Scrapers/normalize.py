@@ -0,0 +1,208 @@
+import argparse
+import glob
+import logging
+import os
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+from dateutil import tz
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    ds = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ['likes', 'retweets', 'replies']
+# Weight of each metric in a tweet's engagement, shared by the trend scheduler and the virality scorer
+ENGAGEMENT_WEIGHTS = {'likes': 1.0, 'retweets': 2.0, 'replies': 1.5}
+METRIC_SUFFIXES = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+METRIC_PATTERN = r'^([0-9]*\.?[0-9]+)\s*([KMB]?)$'
+# Raw files convert_raw has written, one name per line; the leading _ keeps pyarrow from reading it as data
+CONVERTED_MANIFEST = '_converted_files.txt'
+
+
+def local_zone():
+    """The machine's IANA time zone (from TZ or /etc/localtime), else dateutil's local zone"""
+    name = os.environ.get('TZ', '').lstrip(':')
+    if not name and os.path.islink('/etc/localtime'):
+        target = os.path.realpath('/etc/localtime')
+        name = target.split('zoneinfo/', 1)[1] if 'zoneinfo/' in target else ''
+    try:
+        return ZoneInfo(name) if name else tz.tzlocal()
+    except (ZoneInfoNotFoundError, ValueError):
+        return tz.tzlocal()
+
+
+# The scraper writes collection timestamps with datetime.now(), i.e. local time. This is a
+# DST-aware zone rather than today's fixed offset, so rows from either side of a DST change
+# get their own offset and times in the DST gap or overlap can be detected
+LOCAL_TZ = local_zone()
+
+
+def parse_metric(value):
+    """Turn UI engagement text such as '1.2K', '3,456' or '' into an int"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 0 if value != value else int(value)
+    match = re.match(METRIC_PATTERN, str(value).strip().replace(',', '').upper())
+    if not match:
+        return 0
+    return int(round(float(match.group(1)) * METRIC_SUFFIXES[match.group(2)]))
+
+
+def parse_metrics(series):
+    """Vectorized parse_metric over a pandas Series, returning int64"""
+    text = series.astype('string').str.strip().str.replace(',', '', regex=False).str.upper()
+    # Plain digit strings (most stored counts) skip the regex
+    digits = text.str.isdigit().fillna(False).to_numpy(dtype=bool)
+    number = np.zeros(len(text), dtype=np.float64)
+    number[digits] = pd.to_numeric(text[digits]).to_numpy(dtype=np.float64)
+    if not digits.all():
+        parts = text[~digits].str.extract(METRIC_PATTERN)
+        scaled = pd.to_numeric(parts[0], errors='coerce') * parts[1].map(METRIC_SUFFIXES)
+        number[~digits] = scaled.to_numpy(dtype=np.float64, na_value=0)
+    return pd.Series(np.round(number).astype('int64'), index=series.index)
+
+
+def to_epoch_seconds(values):
+    """Convert a Series of timezone-aware datetimes to nullable int64 UTC epoch seconds"""
+    return ((values - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).astype('Int64')
+
+
+def normalize_tweets(df):
+    """Return a typed copy of raw tweet rows.
+
+    Metrics become int64, the tweet date (ISO, UTC) and the collection
+    timestamp (local time) become UTC epoch seconds, username and trend become
+    categoricals, and a 'day' column (collection day as YYYYMMDD) is added for
+    partitioning.
+    """
+    df = df.copy()
+    for column in METRIC_COLUMNS:
+        df[column] = parse_metrics(df[column]) if column in df else 0
+
+    date = pd.to_datetime(df['date'], utc=True, errors='coerce')
+    collected = pd.to_datetime(df['timestamp'], errors='coerce')
+    collected = collected.dt.tz_localize(LOCAL_TZ, ambiguous='NaT', nonexistent='NaT').dt.tz_convert('UTC')
+    df['date'] = to_epoch_seconds(date)
+    df['timestamp'] = to_epoch_seconds(collected)
+    day = collected.fillna(date)
+    df['day'] = (day.dt.year * 10000 + day.dt.month * 100 + day.dt.day).fillna(0).astype('int32')
+
+    for column in ('trend', 'status_id'):
+        if column not in df:
+            df[column] = None
+    df['status_id'] = df['status_id'].astype('string')
+    df['username'] = df['username'].astype('category')
+    df['trend'] = df['trend'].astype('category')
+    df['content'] = df['content'].astype('string')
+    return df
+
+
+def partitioning():
+    """Hive partitioning schema of the typed dataset (day=YYYYMMDD/trend=...)"""
+    return ds.partitioning(pa.schema([('day', pa.int32()), ('trend', pa.string())]), flavor='hive')
+
+
+def write_partitioned(df, root, partition_cols=('day', 'trend')):
+    """Append typed tweets to a Parquet dataset partitioned by day and trend"""
+    if pa is None:
+        raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=list(partition_cols),
+        basename_template=f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{{i}}.parquet",
+    )
+
+
+def load_tweets(root="data/processed/tweets", start_day=None, end_day=None, trends=None, columns=None):
+    """Load typed tweets from the partitioned dataset, reading only the matching partitions"""
+    if pa is None:
+        raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)")
+    filters = []
+    if start_day is not None:
+        filters.append(('day', '>=', int(start_day)))
+    if end_day is not None:
+        filters.append(('day', '<=', int(end_day)))
+    if trends is not None:
+        filters.append(('trend', 'in', list(trends)))
+    table = pq.read_table(root, columns=columns, filters=filters or None, partitioning=partitioning())
+    df = table.to_pandas()
+    if 'trend' in df:
+        df['trend'] = df['trend'].astype('category')
+    return df
+
+
+def export_csv(df, filename):
+    """Write typed tweets back out in the raw CSV layout"""
+    out = df.copy()
+    out['date'] = pd.to_datetime(out['date'], unit='s', utc=True).dt.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    out['timestamp'] = (pd.to_datetime(out['timestamp'], unit='s', utc=True)
+                        .dt.tz_convert(LOCAL_TZ).dt.strftime('%Y-%m-%d %H:%M:%S'))
+    columns = [c for c in ['username', 'content', 'date', 'likes', 'retweets', 'replies', 'timestamp', 'trend',
+                           'status_id'] if c in out]
+    out[columns].to_csv(filename, index=False)
+
+
+def converted_files(root):
+    """Names of the raw files convert_raw has already written into the dataset at root"""
+    try:
+        with open(os.path.join(root, CONVERTED_MANIFEST), encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def convert_raw(raw_dir="data/raw", root="data/processed/tweets"):
+    """Normalize every raw day CSV into the partitioned dataset, skipping files it already has.
+
+    Rows go into the day partition of the file they came from, like
+    PartitionedParquetSink does, so both writers agree on where a tweet lives.
+    Converted files are recorded in a manifest at the dataset root; a day
+    whose partition PartitionedParquetSink already wrote live is skipped too.
+    """
+    total = 0
+    converted = converted_files(root)
+    for filename in sorted(glob.glob(os.path.join(raw_dir, "tweets_*.csv"))):
+        name = os.path.basename(filename)
+        day = name[len("tweets_"):-len(".csv")]
+        if name in converted:
+            logger.info(f"Skipping {filename}, it is already converted")
+            continue
+        if os.path.isdir(os.path.join(root, f"day={day}")):
+            logger.info(f"Skipping {filename}, day {day} was already written by the live sink")
+            continue
+        df = normalize_tweets(pd.read_csv(filename, dtype=str, keep_default_na=False, na_values=['']))
+        df['day'] = int(day)
+        write_partitioned(df, root)
+        with open(os.path.join(root, CONVERTED_MANIFEST), 'a', encoding='utf-8') as f:
+            f.write(name + '\n')
+        total += len(df)
+        logger.info(f"Converted {len(df)} tweets from {filename}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert raw tweet CSVs into typed, partitioned Parquet")
+    parser.add_argument('--raw-dir', default="data/raw")
+    parser.add_argument('--out', default="data/processed/tweets")
+    args = parser.parse_args()
+    total = convert_raw(args.raw_dir, args.out)
+    logger.info(f"Converted {total} tweets into {args.out}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
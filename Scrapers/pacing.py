@@ -0,0 +1,136 @@
+import logging
+import random
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from extraction import TWEET_SELECTOR
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Installs a PerformanceObserver (once per page) that remembers when the last
+# network resource finished, then reports how long the network has been quiet.
+NETWORK_QUIET_JS = """
+if (!window.__taNetwork) {
+    window.__taNetwork = {last: performance.now()};
+    try {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                window.__taNetwork.last = Math.max(window.__taNetwork.last, entry.responseEnd || performance.now());
+            }
+        }).observe({type: 'resource', buffered: true});
+    } catch (e) {}
+}
+return performance.now() - window.__taNetwork.last;
+"""
+
+PAGE_STATE_JS = """
+return [document.querySelectorAll(arguments[0]).length, document.body.scrollHeight];
+"""
+
+
+def element_present(selector):
+    """Condition: an element matching the CSS selector is in the DOM"""
+    return EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+
+
+def content_grew(article_count, scroll_height, selector=TWEET_SELECTOR):
+    """Condition: more articles were rendered or the page got taller since the given state"""
+    def condition(driver):
+        count, height = driver.execute_script(PAGE_STATE_JS, selector)
+        return count > article_count or height != scroll_height
+    return condition
+
+
+def network_idle(quiet_ms=500):
+    """Condition: no network resource has finished loading for quiet_ms milliseconds"""
+    def condition(driver):
+        quiet = driver.execute_script(NETWORK_QUIET_JS)
+        # Drivers that don't run page scripts (e.g. test doubles) return None; don't wait on them
+        return quiet is None or quiet >= quiet_ms
+    return condition
+
+
+class Pacer:
+    """Event-driven replacement for fixed random sleeps.
+
+    Each wait polls a concrete page condition and returns as soon as it holds,
+    followed by a short random jitter for politeness. Every named wait is
+    observed in the pacer_wait_seconds histogram of the metrics registry, and
+    its count, total and longest time since the last log_summary() are kept for
+    a per-pass summary().
+    """
+
+    def __init__(self, driver, timeout=20, poll_frequency=0.2, jitter=(0.3, 1.0), metrics=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.jitter_range = jitter
+        self.metrics = metrics or REGISTRY
+        self.timings = {}  # name -> [count, total seconds, longest seconds]
+
+    def jitter(self, min_seconds=None, max_seconds=None):
+        """Short random pause kept between actions for politeness"""
+        low, high = self.jitter_range
+        delay = random.uniform(low if min_seconds is None else min_seconds,
+                               high if max_seconds is None else max_seconds)
+        time.sleep(delay)
+        self.metrics.observe('pacer_wait_seconds', delay, wait='jitter', outcome='ok')
+
+    def wait_for(self, name, condition, timeout=None, raise_on_timeout=False):
+        """Wait until condition(driver) is truthy, record how long it took and add jitter.
+
+        Returns the condition's value, or None if it timed out (unless
+        raise_on_timeout is set, in which case the TimeoutException propagates).
+        """
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout or self.timeout, self.poll_frequency).until(condition)
+        except TimeoutException:
+            self._record(name, time.monotonic() - start, 'timeout')
+            if raise_on_timeout:
+                raise
+            return None
+        self._record(name, time.monotonic() - start, 'ok')
+        self.jitter()
+        return result
+
+    def _record(self, name, seconds, outcome):
+        stats = self.timings.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        self.metrics.observe('pacer_wait_seconds', seconds, wait=name, outcome=outcome)
+
+    def page_state(self, selector=TWEET_SELECTOR):
+        """Return the current (article count, scroll height) in one round-trip"""
+        return tuple(self.driver.execute_script(PAGE_STATE_JS, selector))
+
+    def wait_for_new_content(self, article_count, scroll_height, timeout=8):
+        """Wait for a scroll to render new articles; returns False if nothing arrived in time"""
+        return bool(self.wait_for('scroll', content_grew(article_count, scroll_height), timeout=timeout))
+
+    def wait_for_network_idle(self, quiet_ms=500, timeout=5):
+        """Wait until the page has stopped loading resources"""
+        return bool(self.wait_for('network_idle', network_idle(quiet_ms), timeout=timeout))
+
+    def summary(self):
+        """Return {wait name: (count, total seconds, mean seconds, max seconds)}"""
+        return {
+            name: (count, total, total / count, longest)
+            for name, (count, total, longest) in self.timings.items() if count
+        }
+
+    def log_summary(self):
+        """Log how long each kind of wait took since the last summary, then start a new pass"""
+        for name, (count, total, mean, longest) in sorted(self.summary().items()):
+            logger.info(f"Wait '{name}': {count} waits, {total:.1f}s total, {mean:.2f}s mean, {longest:.2f}s max")
+        self.reset()
+
+    def reset(self):
+        """Forget recorded timings"""
+        self.timings.clear()
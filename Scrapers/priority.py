@@ -0,0 +1,312 @@
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime
+
+from normalize import ENGAGEMENT_WEIGHTS, parse_metric
+
+logger = logging.getLogger(__name__)
+
+
+def engagement(tweet):
+    """Weighted likes/retweets/replies of one tweet"""
+    return sum(parse_metric(tweet.get(metric)) * weight for metric, weight in ENGAGEMENT_WEIGHTS.items())
+
+
+def posting_span(tweets):
+    """Seconds between the oldest and newest tweet dates, or None if fewer than two are dated"""
+    stamps = []
+    for tweet in tweets:
+        try:
+            stamps.append(datetime.fromisoformat(str(tweet.get('date')).replace('Z', '+00:00')).timestamp())
+        except ValueError:
+            continue
+    return max(stamps) - min(stamps) if len(stamps) >= 2 else None
+
+
+class CostModel:
+    """Browser seconds per visit as overhead + per_tweet * tweets fetched, fit by decayed least squares"""
+
+    def __init__(self, overhead=5.0, per_tweet=0.5, decay=0.95):
+        self.overhead = overhead
+        self.per_tweet = per_tweet
+        self.decay = decay
+        self._n = self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def update(self, tweets, seconds):
+        d = self.decay
+        self._n = self._n * d + 1
+        self._sx = self._sx * d + tweets
+        self._sy = self._sy * d + seconds
+        self._sxx = self._sxx * d + tweets * tweets
+        self._sxy = self._sxy * d + tweets * seconds
+        variance = self._n * self._sxx - self._sx ** 2
+        if self._n >= 3 and variance > 1e-9:
+            slope = (self._n * self._sxy - self._sx * self._sy) / variance
+            self.per_tweet = max(slope, 0.01)
+            self.overhead = max((self._sy - self.per_tweet * self._sx) / self._n, 0.1)
+        else:
+            # Too few distinct depths to separate the terms yet: scale both to match
+            predicted = self.predict(tweets)
+            scale = seconds / predicted if predicted > 0 else 1
+            self.overhead = max(self.overhead * scale ** 0.5, 0.1)
+            self.per_tweet = max(self.per_tweet * scale ** 0.5, 0.01)
+
+    def predict(self, tweets):
+        return self.overhead + self.per_tweet * tweets
+
+    def to_list(self):
+        return [self.overhead, self.per_tweet, self._n, self._sx, self._sy, self._sxx, self._sxy]
+
+    def restore(self, values):
+        self.overhead, self.per_tweet, self._n, self._sx, self._sy, self._sxx, self._sxy = values
+
+
+class TrendState:
+    """What the scheduler knows about one trend"""
+
+    def __init__(self, trend, prior_rate):
+        self.trend = trend
+        self.rate = prior_rate  # Estimated new tweets per second
+        self.engagement = None  # EWMA of mean engagement per new tweet
+        self.growth = 0.0  # Relative change of that mean on the last visit
+        self.last_visit = None
+        self.visits = 0
+        self.active = True
+
+    @property
+    def name(self):
+        return self.trend['name']
+
+    def to_dict(self):
+        return {'trend': self.trend, 'rate': self.rate, 'engagement': self.engagement, 'growth': self.growth,
+                'last_visit': self.last_visit, 'visits': self.visits, 'active': self.active}
+
+    @classmethod
+    def from_dict(cls, state):
+        trend_state = cls(state['trend'], state['rate'])
+        for key in ('engagement', 'growth', 'last_visit', 'visits', 'active'):
+            setattr(trend_state, key, state[key])
+        return trend_state
+
+
+class AdaptiveScheduler:
+    """Picks which trend to scrape next, and how deep, by expected fresh tweets per browser second.
+
+    Every trend keeps an estimate of its posting rate and of how fast its
+    engagement is growing. The value of a visit is the number of new tweets
+    expected since the last one, boosted by engagement growth; its cost comes
+    from a model of browser seconds per visit fitted to past visits. Requests
+    (page loads plus scrolls) are capped at request_budget per hour, and when
+    no trend is expected to have min_yield new tweets yet the scheduler waits
+    instead of spending browser time. The default budget is about what the old
+    fixed cycle (5 tweets from each of ~30 trends, then 300 s of sleep) used.
+
+    With a CrawlCheckpoint, the estimates and the request log are saved after
+    every step and restored on start. Trends that have been off the trending
+    list and unvisited for trend_ttl seconds are dropped from both. A cycle that the fixed loop
+    (get_trending_tweets) left unfinished seeds the trend list instead.
+    """
+
+    def __init__(self, request_budget=380, min_depth=5, max_depth=60, min_yield=2, min_interval=60,
+                 trend_refresh=900, prior_rate=1 / 30, growth_weight=0.5, smoothing=0.5, max_wait=300,
+                 trend_ttl=86400, checkpoint=None):
+        self.request_budget = request_budget
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.min_yield = min_yield
+        self.min_interval = min_interval
+        self.trend_refresh = trend_refresh
+        self.prior_rate = prior_rate
+        self.growth_weight = growth_weight
+        self.smoothing = smoothing
+        self.max_wait = max_wait
+        self.trend_ttl = trend_ttl
+        self.trends = {}
+        self.cost = CostModel()
+        self.tweets_per_scroll = 5.0
+        self.requests = deque()  # (time, requests) within the last hour
+        self.trends_updated = None
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            self.resume(checkpoint)
+
+    def to_dict(self):
+        return {
+            'trends': [state.to_dict() for state in self.trends.values()],
+            'cost': self.cost.to_list(),
+            'tweets_per_scroll': self.tweets_per_scroll,
+            'requests': [list(entry) for entry in self.requests],
+            'trends_updated': self.trends_updated,
+        }
+
+    def resume(self, checkpoint):
+        """Restore saved scheduler state, or take over an interrupted fixed cycle's trends"""
+        state = checkpoint.scheduler
+        if state:
+            self.trends = {s['trend']['name']: TrendState.from_dict(s) for s in state['trends']}
+            self.cost.restore(state['cost'])
+            self.tweets_per_scroll = state['tweets_per_scroll']
+            self.requests = deque(tuple(entry) for entry in state['requests'])
+            self.trends_updated = state['trends_updated']
+            logger.info(f"Resumed scheduling {len(self.trends)} trends from the checkpoint")
+        elif checkpoint.in_progress:
+            trends = checkpoint.pending()
+            self.update_trends(trends)
+            checkpoint.finish_cycle()
+            logger.info(f"Scheduling the {len(trends)} trends left from an interrupted cycle")
+
+    def save(self):
+        if self.checkpoint is not None:
+            self.checkpoint.save_scheduler(self.to_dict())
+
+    def trends_due(self, now=None):
+        now = time.time() if now is None else now
+        return self.trends_updated is None or now - self.trends_updated >= self.trend_refresh
+
+    def update_trends(self, trends, now=None):
+        """Merge a freshly read trend list: new trends start from the average known rate"""
+        now = time.time() if now is None else now
+        known = [state.rate for state in self.trends.values() if state.visits]
+        prior = sum(known) / len(known) if known else self.prior_rate
+        names = {trend['name'] for trend in trends}
+        for state in self.trends.values():
+            state.active = state.name in names
+        for trend in trends:
+            if trend['name'] in self.trends:
+                self.trends[trend['name']].trend = trend
+            else:
+                self.trends[trend['name']] = TrendState(trend, prior)
+        # Forget trends that have left the list and were never visited, or not for trend_ttl
+        # seconds, along with their checkpointed since ids, so the saved state stays bounded
+        expired = [n for n, s in self.trends.items()
+                   if not s.active and (s.visits == 0 or now - s.last_visit >= self.trend_ttl)]
+        for name in expired:
+            del self.trends[name]
+        if expired and self.checkpoint is not None:
+            self.checkpoint.forget(expired)
+        self.trends_updated = now
+
+    def requests_used(self, now=None):
+        now = time.time() if now is None else now
+        while self.requests and now - self.requests[0][0] >= 3600:
+            self.requests.popleft()
+        return sum(count for _, count in self.requests)
+
+    def expected_requests(self, depth):
+        return 1 + math.ceil(depth / max(self.tweets_per_scroll, 1))
+
+    def plan(self, state, now):
+        """(depth, expected new tweets, score) for visiting a trend now"""
+        elapsed = now - state.last_visit if state.last_visit is not None else self.trend_refresh
+        expected = state.rate * elapsed
+        # Ask for a little more than expected, so a burst is not cut off
+        depth = int(min(self.max_depth, max(self.min_depth, math.ceil(expected * 1.25))))
+        value = min(expected, depth) * (1 + self.growth_weight * max(state.growth, 0))
+        return depth, expected, value / self.cost.predict(depth)
+
+    def next(self, now=None):
+        """Return (trend, depth, 0) to scrape now, or (None, 0, seconds to wait)"""
+        now = time.time() if now is None else now
+        used = self.requests_used(now)
+        candidates = [s for s in self.trends.values()
+                      if s.active and (s.last_visit is None or now - s.last_visit >= self.min_interval)]
+        if not candidates:
+            return None, 0, self._wait_for_interval(now)
+
+        best, best_depth, best_expected, best_score = None, 0, 0, -1
+        for state in candidates:
+            depth, expected, score = self.plan(state, now)
+            if score > best_score:
+                best, best_depth, best_expected, best_score = state, depth, expected, score
+
+        if best_expected < self.min_yield:
+            # Nothing has had time to produce enough fresh tweets; wait until the fastest one should have
+            soonest = min((self.min_yield - self.plan(s, now)[1]) / max(s.rate, 1e-6) for s in candidates)
+            return None, 0, min(max(soonest, 1), self.max_wait)
+
+        if used + self.expected_requests(best_depth) > self.request_budget:
+            if not self.requests:
+                return None, 0, self.max_wait
+            # Wait until enough of the last hour's requests have aged out
+            return None, 0, min(max(self.requests[0][0] + 3600 - now, 1), self.max_wait)
+        return best.trend, best_depth, 0
+
+    def _wait_for_interval(self, now):
+        visited = [s.last_visit for s in self.trends.values() if s.active and s.last_visit is not None]
+        if not visited:
+            return self.max_wait
+        return min(max(min(visited) + self.min_interval - now, 1), self.max_wait)
+
+    def record(self, trend, tweets, depth, seconds, requests, now=None):
+        """Update a trend's rate and engagement growth, and the cost model, after a visit"""
+        now = time.time() if now is None else now
+        state = self.trends.get(trend['name'])
+        if state is None:
+            return
+        fetched = len(tweets)
+        if fetched >= depth:
+            # Saturated: there were more than we fetched, so measure the rate from the posting times
+            span = posting_span(tweets)
+            observed = (fetched - 1) / span if span else fetched / max(now - (state.last_visit or now), 1)
+            observed = max(observed, state.rate)
+        elif state.last_visit is not None:
+            observed = fetched / max(now - state.last_visit, 1)
+        else:
+            span = posting_span(tweets)
+            observed = (fetched - 1) / span if span else self.prior_rate
+        state.rate = self.smoothing * observed + (1 - self.smoothing) * state.rate
+
+        if fetched:
+            mean = sum(engagement(t) for t in tweets) / fetched
+            if state.engagement:
+                state.growth = max(min(mean / state.engagement - 1, 2.0), -0.5)
+                state.engagement = self.smoothing * mean + (1 - self.smoothing) * state.engagement
+            else:
+                state.engagement = mean or None
+        state.last_visit = now
+        state.visits += 1
+
+        self.cost.update(fetched, seconds)
+        self.requests.append((now, requests))
+        if requests > 1 and fetched:
+            self.tweets_per_scroll = (self.smoothing * fetched / (requests - 1)
+                                      + (1 - self.smoothing) * self.tweets_per_scroll)
+
+    def step(self, scraper, now=None):
+        """Do one unit of work with a TwitterScraper; returns how long to wait before the next step"""
+        now = time.time() if now is None else now
+        if self.trends_due(now):
+            # Trend refreshes are the scheduler's natural checkpoints, so persist buffered tweets here
+            scraper.sink.flush()
+            scraper.seen_index.flush()
+            requests_before = scraper.requests
+            trends = scraper.get_trend_list()
+            self.requests.append((now, scraper.requests - requests_before))
+            if not trends:
+                return self.max_wait
+            self.update_trends(trends, now)
+            self.save()
+            return 0
+
+        trend, depth, wait = self.next(now)
+        if trend is None:
+            return wait
+        requests_before = scraper.requests
+        start = time.monotonic()
+        tweets = scraper.scrape_trend(trend, depth)
+        seconds = time.monotonic() - start
+        self.record(trend, tweets, depth, seconds, scraper.requests - requests_before)
+        self.save()
+        state = self.trends[trend['name']]
+        logger.info("Scheduled %s: %d/%d new tweets, rate %.1f/min, engagement growth %+.0f%%",
+                    trend['name'], len(tweets), depth, state.rate * 60, state.growth * 100,
+                    extra={'event': 'schedule', 'trend': trend['name'], 'depth': depth, 'tweets': len(tweets),
+                           'rate_per_min': round(state.rate * 60, 2), 'growth': round(state.growth, 3)})
+        return 0
+
+    def summary(self):
+        """Trends ordered by estimated rate, as (name, tweets per minute, growth, visits)"""
+        return sorted(((s.name, s.rate * 60, s.growth, s.visits) for s in self.trends.values() if s.active),
+                      key=lambda item: item[1], reverse=True)
@@ -0,0 +1,152 @@
+import argparse
+import logging
+import os
+import queue
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from jsonlog import configure_logging
+from metrics import MetricsFileWriter, serve_prometheus
+from storage import CSVSink
+from seen_index import SeenIndex
+from twitter import TwitterScraper
+
+logger = logging.getLogger(__name__)
+
+
+class TrendScheduler:
+    """Spread one pass over the trending list across a pool of TwitterScraper workers.
+
+    The trend list is read once, then each worker (its own Chrome driver and
+    logged-in session) pulls the next trend off a shared queue until it is
+    empty. All workers write through the same sink and seen index, which are
+    thread-safe, so there is still a single writer per output file.
+    """
+
+    def __init__(self, accounts, num_workers=3, max_tweets_per_trend=5, politeness=(5, 10),
+                 sink=None, seen_index=None):
+        self.accounts = list(accounts)
+        self.num_workers = num_workers
+        self.max_tweets_per_trend = max_tweets_per_trend
+        self.politeness = politeness
+        self.sink = sink or CSVSink()
+        self.seen_index = seen_index if seen_index is not None else SeenIndex()
+        self.workers = []
+
+    def start(self):
+        """Launch the worker browsers that aren't running yet, then log them in in parallel.
+
+        Browsers are launched one after another: every uc.Chrome launch patches
+        the same chromedriver binary, and concurrent launches fail at random.
+        """
+        missing = self.num_workers - len(self.workers)
+        if missing <= 0:
+            return self.workers
+        launched = [self._launch_worker(index) for index in range(len(self.workers), self.num_workers)]
+        launched = [(index, worker) for index, worker in launched if worker is not None]
+        if launched:
+            with ThreadPoolExecutor(max_workers=len(launched)) as executor:
+                started = list(executor.map(lambda entry: self._login_worker(*entry), launched))
+            self.workers.extend(worker for worker in started if worker is not None)
+        logger.info(f"{len(self.workers)} of {self.num_workers} workers ready")
+        return self.workers
+
+    def run(self, trends=None):
+        """Scrape every trend once across the worker pool and return the collected tweets"""
+        workers = self.start()
+        if not workers:
+            logger.error("No workers available, skipping cycle")
+            return []
+
+        if trends is None:
+            trends = workers[0].get_trend_list()
+        pending = queue.Queue()
+        for trend in trends:
+            pending.put(trend)
+
+        filename = self.sink.path_for(datetime.now().strftime("%Y%m%d"))
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            results = list(executor.map(lambda w: self._work(w, pending, filename), workers))
+        tweets = [tweet for batch in results for tweet in batch]
+
+        self.sink.flush(filename)
+        self.seen_index.flush()
+        logger.info(f"Collected {len(tweets)} tweets from {len(trends)} trends with "
+                    f"{len(workers)} workers in {time.monotonic() - start:.1f} seconds")
+        return tweets
+
+    def close(self):
+        """Close every worker browser and flush the shared storage"""
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+        self.sink.close()
+        self.seen_index.close()
+
+    def _launch_worker(self, index):
+        username, password = self.accounts[index % len(self.accounts)]
+        try:
+            # Chrome locks its profile directory, so every worker gets its own
+            worker = TwitterScraper(username, password, sink=self.sink, seen_index=self.seen_index,
+                                    profile_dir=f"data/session/profile_{index}")
+        except Exception as e:
+            logger.error(f"Error starting worker {index + 1}: {str(e)}")
+            return index, None
+        return index, worker
+
+    def _login_worker(self, index, worker):
+        if not worker.ensure_session():
+            logger.error(f"Worker {index + 1} failed to login")
+            worker.close()
+            return None
+        return worker
+
+    def _work(self, worker, pending, filename):
+        tweets = []
+        while True:
+            try:
+                trend = pending.get_nowait()
+            except queue.Empty:
+                return tweets
+            tweets.extend(worker.scrape_trend(trend, self.max_tweets_per_trend, filename))
+            # Politeness delay between page loads, per worker
+            worker.random_sleep(*self.politeness)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape trending topics with several browsers at once")
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--max-tweets-per-trend', type=int, default=5)
+    parser.add_argument('--metrics-port', type=int, default=None, help='serve Prometheus metrics on this port')
+    parser.add_argument('--metrics-file', default="data/metrics/scraper.json")
+    parser.add_argument('--log-file', default="data/logs/scraper.jsonl", help='JSON-lines log file')
+    args = parser.parse_args()
+    configure_logging(args.log_file)
+
+    os.makedirs("data/raw", exist_ok=True)
+    scheduler = TrendScheduler(
+        accounts=[("", "")],
+        num_workers=args.workers,
+        max_tweets_per_trend=args.max_tweets_per_trend,
+    )
+    if args.metrics_port:
+        serve_prometheus(args.metrics_port)
+    metrics_writer = MetricsFileWriter(args.metrics_file).start()
+    try:
+        while True:
+            scheduler.run()
+            delay = random.uniform(10, 15)
+            logger.info(f"Waiting {delay:.1f} seconds before next cycle...")
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        logger.info("Received termination signal. Cleaning up...")
+    finally:
+        scheduler.close()
+        metrics_writer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import bisect
+import hashlib
+import logging
+import os
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Kept with the other session state rather than next to the tracked raw data
+DEFAULT_PATH = "data/session/seen_index.bin"
+LEGACY_PATH = "data/raw/seen_index.bin"
+
+
+def tweet_key(tweet):
+    """Return the (username, content) pair used to dedup tweets.
+
+    Posts without text (caption-less Instagram posts) would all share one key
+    per account, so for those the content part is the post's status_id.
+    """
+    username = tweet.get('username')
+    content = tweet.get('content')
+    if not content and tweet.get('status_id'):
+        content = f"\x00id:{tweet['status_id']}"
+    return (
+        '' if username is None else str(username),
+        '' if content is None else str(content),
+    )
+
+
+def hash64(text):
+    """64-bit blake2b hash of a string (None hashes like ''), the encoding every index stores"""
+    return int.from_bytes(hashlib.blake2b((text or '').encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def content_hash(username, content):
+    """Return a 64-bit hash of a tweet's (username, content) pair"""
+    return hash64(f"{'' if username is None else username}\x00{'' if content is None else content}")
+
+
+class SeenIndex:
+    """Compact on-disk set of tweets that have already been collected.
+
+    The index is a sorted array of 64-bit (username, content) hashes in
+    ``path`` plus an append-only spill file ``path + '.spill'`` holding hashes
+    added since the last compaction. Both are raw uint64 arrays, so loading
+    them is a single read rather than a parse. The spill is merged into the
+    sorted array when it grows past ``compact_threshold`` entries.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, compact_threshold=100000):
+        self.path = path
+        self.spill_path = path + '.spill'
+        if path == DEFAULT_PATH:
+            self._move_legacy()
+        self.compact_threshold = compact_threshold
+        self._sorted = array('Q')
+        self._recent = set()
+        self._pending = array('Q')
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the sorted array and spill file from disk"""
+        with self._lock:
+            self._sorted = self._read(self.path)
+            self._recent = set(self._read(self.spill_path))
+            self._pending = array('Q')
+        logger.info(f"Loaded seen index with {len(self)} tweets from {self.path}")
+        if len(self._recent) >= self.compact_threshold:
+            self.compact()
+
+    def _move_legacy(self):
+        """Move an index left in data/raw by earlier versions to the default path"""
+        if os.path.exists(self.path) or not os.path.exists(LEGACY_PATH):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        for old, new in ((LEGACY_PATH, self.path), (LEGACY_PATH + '.spill', self.spill_path)):
+            if os.path.exists(old):
+                os.replace(old, new)
+        logger.info(f"Moved seen index from {LEGACY_PATH} to {self.path}")
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def contains(self, username, content):
+        """Check whether a (username, content) pair has been collected before"""
+        return self._contains_hash(content_hash(username, content))
+
+    def seen(self, tweet):
+        """Check whether a tweet dict has been collected before"""
+        return self.contains(*tweet_key(tweet))
+
+    def add(self, username, content):
+        """Mark a (username, content) pair as collected; returns False if it already was"""
+        value = content_hash(username, content)
+        with self._lock:
+            if self._contains_hash(value):
+                return False
+            self._recent.add(value)
+            self._pending.append(value)
+            return True
+
+    def add_many(self, tweets):
+        """Mark a batch of tweet dicts as collected and return how many were new"""
+        return sum(self.add(*tweet_key(tweet)) for tweet in tweets)
+
+    def flush(self):
+        """Append hashes added since the last flush to the spill file"""
+        with self._lock:
+            if not self._pending:
+                return
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, 'ab') as f:
+                self._pending.tofile(f)
+            self._pending = array('Q')
+            should_compact = len(self._recent) >= self.compact_threshold
+        if should_compact:
+            self.compact()
+
+    def compact(self):
+        """Merge the spill file into the sorted array and truncate the spill"""
+        with self._lock:
+            merged = array('Q', sorted(set(self._sorted).union(self._recent)))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # Write to a temp file and swap it in so a crash never leaves a torn index
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                merged.tofile(f)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+
+            # Pending hashes are part of the merged array now, so nothing is left to spill
+            self._sorted = merged
+            self._recent = set()
+            self._pending = array('Q')
+        logger.info(f"Compacted seen index to {len(merged)} tweets")
+
+    def close(self):
+        """Persist any pending hashes"""
+        self.flush()
+
+    def _contains_hash(self, value):
+        if value in self._recent:
+            return True
+        i = bisect.bisect_left(self._sorted, value)
+        return i < len(self._sorted) and self._sorted[i] == value
+
+    @staticmethod
+    def _read(path):
+        values = array('Q')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Ignore a trailing partial record left by an interrupted append
+            values.frombytes(data[:len(data) - len(data) % values.itemsize])
+        return values
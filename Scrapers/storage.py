@@ -0,0 +1,334 @@
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet backend is optional
+    pa = None
+    ds = None
+    pq = None
+
+from normalize import normalize_tweets, write_partitioned
+from seen_index import content_hash, tweet_key
+
+logger = logging.getLogger(__name__)
+
+TWEET_COLUMNS = ['username', 'content', 'date', 'likes', 'retweets', 'replies', 'timestamp', 'trend', 'status_id']
+KEY_COLUMNS = ['username', 'content', 'status_id']
+
+
+def _parquet_keys(path):
+    """Return the tweet keys stored in a directory of Parquet part files"""
+    # An explicit schema reads status_id as null from parts written before it was stored
+    schema = pa.schema([(column, pa.string()) for column in KEY_COLUMNS])
+    table = ds.dataset(path, schema=schema, format='parquet', partitioning=None).to_table()
+    return {tweet_key(row) for row in table.to_pylist()}
+
+
+class TweetSink:
+    """Base class for append-only tweet storage with buffered, batched flushes.
+
+    Each output path keeps an in-memory set of 64-bit (username, content)
+    hashes, loaded once the first time the path is written to, so a write
+    costs O(batch) regardless of how large the file on disk has grown. Only
+    the path being written to stays in memory: when writes move on to another
+    path (a new day), the previous one is flushed and its state dropped, and
+    flush() drops every path but the current one.
+    """
+
+    extension = ''
+
+    def __init__(self, directory="data/raw", batch_size=50, flush_interval=30, columns=None):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.columns = list(columns or TWEET_COLUMNS)
+        self._buffers = {}
+        self._keys = {}
+        self._last_flush = {}
+        self._current = None
+        self._lock = threading.RLock()
+
+    def path_for(self, day):
+        """Return the output path for a day stamp such as 20250521"""
+        return os.path.join(self.directory, f"tweets_{day}{self.extension}")
+
+    def write(self, tweets, path):
+        """Buffer new tweets for path and return how many were not duplicates"""
+        with self._lock:
+            if path != self._current:
+                previous, self._current = self._current, path
+                if previous is not None:
+                    self._flush_path(previous)
+                    self._evict(previous)
+            keys = self._keys_for(path)
+            buffer = self._buffers.setdefault(path, [])
+            accepted = 0
+            for tweet in tweets:
+                key = content_hash(*tweet_key(tweet))
+                if key in keys:
+                    continue
+                keys.add(key)
+                buffer.append({column: tweet.get(column) for column in self.columns})
+                accepted += 1
+
+            last_flush = self._last_flush.setdefault(path, time.monotonic())
+            if len(buffer) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_path(path)
+            return accepted
+
+    def seen(self, tweet, path):
+        """Check whether a tweet is already stored (or buffered) under path"""
+        with self._lock:
+            return content_hash(*tweet_key(tweet)) in self._keys_for(path)
+
+    def flush(self, path=None):
+        """Write buffered tweets to disk, for one path or for all of them"""
+        with self._lock:
+            paths = [path] if path is not None else list(self._buffers)
+            for p in paths:
+                self._flush_path(p)
+                if p != self._current:
+                    self._evict(p)
+
+    def close(self):
+        """Flush everything that is still buffered"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _keys_for(self, path):
+        keys = self._keys.get(path)
+        if keys is None:
+            keys = set()
+            if os.path.exists(path):
+                try:
+                    keys = {content_hash(username, content) for username, content in self._load_keys(path)}
+                except Exception as e:
+                    logger.warning(f"Error reading existing keys from {path}: {str(e)}")
+            self._keys[path] = keys
+        return keys
+
+    def _flush_path(self, path):
+        buffer = self._buffers.get(path)
+        self._last_flush[path] = time.monotonic()
+        if not buffer:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._append(path, buffer)
+        logger.info(f"Flushed {len(buffer)} tweets to {path}")
+        self._buffers[path] = []
+
+    def _evict(self, path):
+        """Forget a flushed path's keys; they are reloaded from disk if it is written to again"""
+        self._buffers.pop(path, None)
+        self._keys.pop(path, None)
+        self._last_flush.pop(path, None)
+
+    def _load_keys(self, path):
+        """Return the (username, content) keys already stored under path"""
+        raise NotImplementedError
+
+    def _append(self, path, rows):
+        raise NotImplementedError
+
+
+class CSVSink(TweetSink):
+    """Append-only CSV storage, compatible with the existing data/raw files"""
+
+    extension = '.csv'
+
+    def _load_keys(self, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return {tweet_key(row) for row in csv.DictReader(f)}
+
+    def _append(self, path, rows):
+        header = None
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+
+        # Keep the column order of an existing file so old and new rows line up
+        fieldnames = header or self.columns
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            if header is None:
+                writer.writeheader()
+            writer.writerows(rows)
+
+
+class JSONLSink(TweetSink):
+    """Append-only JSON lines storage, one tweet object per line"""
+
+    extension = '.jsonl'
+
+    def _load_keys(self, path):
+        keys = set()
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    keys.add(tweet_key(json.loads(line)))
+        return keys
+
+    def _append(self, path, rows):
+        with open(path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class SQLiteSink(TweetSink):
+    """SQLite storage with one database file per day and a unique index on the tweet_key"""
+
+    extension = '.db'
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path)
+        columns = ', '.join(f'"{column}" TEXT' for column in self.columns)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS tweets ({columns})")
+        # Databases written before a column was added to the schema get it appended
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(tweets)")}
+        for column in self.columns:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE tweets ADD COLUMN "{column}" TEXT')
+        # Same key as tweet_key: posts without text are unique by status_id
+        conn.execute("DROP INDEX IF EXISTS tweets_key")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS tweets_dedup_key ON tweets "
+                     "(username, coalesce(nullif(content, ''), char(0) || 'id:' || status_id, ''))")
+        return conn
+
+    def _load_keys(self, path):
+        conn = self._connect(path)
+        try:
+            return {tweet_key({'username': u, 'content': c, 'status_id': i})
+                    for u, c, i in conn.execute("SELECT username, content, status_id FROM tweets")}
+        finally:
+            conn.close()
+
+    def _append(self, path, rows):
+        columns = ', '.join(f'"{column}"' for column in self.columns)
+        placeholders = ', '.join('?' for _ in self.columns)
+        values = [tuple(None if row[c] is None else str(row[c]) for c in self.columns) for row in rows]
+        conn = self._connect(path)
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR IGNORE INTO tweets ({columns}) VALUES ({placeholders})", values)
+        finally:
+            conn.close()
+
+
+class ParquetSink(TweetSink):
+    """Parquet storage, written as one part file per flushed batch inside a per-day directory"""
+
+    extension = '.parquet'
+
+    def __init__(self, *args, **kwargs):
+        if pa is None:
+            raise ImportError("ParquetSink requires pyarrow (pip install pyarrow)")
+        super().__init__(*args, **kwargs)
+
+    def _load_keys(self, path):
+        return _parquet_keys(path)
+
+    def _append(self, path, rows):
+        os.makedirs(path, exist_ok=True)
+        part = len([name for name in os.listdir(path) if name.endswith('.parquet')])
+        table = pa.Table.from_pylist(
+            [{c: None if row[c] is None else str(row[c]) for c in self.columns} for row in rows],
+            schema=pa.schema([(c, pa.string()) for c in self.columns]),
+        )
+        pq.write_table(table, os.path.join(path, f"part-{part:05d}.parquet"))
+
+
+class PartitionedParquetSink(TweetSink):
+    """Typed Parquet dataset partitioned by collection day and trend.
+
+    Batches go through normalize_tweets before they are written, so metrics are
+    int64, dates are UTC epoch seconds and usernames/trends are dictionary
+    encoded. The output path for a day is its day=YYYYMMDD partition.
+    """
+
+    def __init__(self, directory="data/processed/tweets", *args, **kwargs):
+        if pa is None:
+            raise ImportError("PartitionedParquetSink requires pyarrow (pip install pyarrow)")
+        super().__init__(directory, *args, **kwargs)
+
+    def path_for(self, day):
+        return os.path.join(self.directory, f"day={day}")
+
+    def _load_keys(self, path):
+        return _parquet_keys(path)
+
+    def _append(self, path, rows):
+        df = normalize_tweets(pd.DataFrame(rows, columns=self.columns))
+        # Keep rows in the partition they were written for, even across midnight
+        df['day'] = int(os.path.basename(path).split('=', 1)[1])
+        write_partitioned(df, self.directory)
+
+
+class MultiSink:
+    """Write the same tweets to several sinks, e.g. typed Parquet plus a CSV export.
+
+    Paths handed out by path_for are day stamps; each sink maps them to its own
+    output path.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def path_for(self, day):
+        return day
+
+    def write(self, tweets, day):
+        """Write tweets to every sink and return how many the first one accepted"""
+        counts = [sink.write(tweets, sink.path_for(day)) for sink in self.sinks]
+        return counts[0] if counts else 0
+
+    def seen(self, tweet, day):
+        return all(sink.seen(tweet, sink.path_for(day)) for sink in self.sinks)
+
+    def flush(self, day=None):
+        for sink in self.sinks:
+            sink.flush(None if day is None else sink.path_for(day))
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+SINKS = {
+    'csv': CSVSink,
+    'jsonl': JSONLSink,
+    'sqlite': SQLiteSink,
+    'parquet': ParquetSink,
+    'parquet_partitioned': PartitionedParquetSink,
+}
+
+
+def make_sink(kind='csv', **kwargs):
+    """Create a storage backend by name (csv, jsonl, sqlite or parquet)"""
+    try:
+        return SINKS[kind](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {kind}")
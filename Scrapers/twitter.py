@@ -3,15 +3,26 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-import pandas as pd
+from selenium.common.exceptions import TimeoutException
 import os
+import json
 from datetime import datetime
 import logging
 import time
 import random
 import signal
 import sys
+import threading
+from urllib.parse import quote
+
+from storage import CSVSink, tweet_key
+from seen_index import SeenIndex
+from extraction import TWEET_SELECTOR, extract_tweets
+from pacing import Pacer, element_present
+from metrics import REGISTRY, MetricsFileWriter, timed
+from checkpoint import CrawlCheckpoint, status_id_of
+from priority import AdaptiveScheduler
+from jsonlog import configure_logging
 
 # Configure logging
 logging.basicConfig(
@@ -20,13 +31,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://x.com"
+HOME_PATH = "/home"
+TRENDING_PATH = "/explore/tabs/trending"
+SEARCH_PATH = "/search?q={query}&f=live"
+HOME_URL = BASE_URL + HOME_PATH
+TRENDING_URL = BASE_URL + TRENDING_PATH
+SEARCH_URL = BASE_URL + SEARCH_PATH
+
+# uc.Chrome re-downloads and patches one shared chromedriver binary on every launch, so
+# concurrent launches (worker pools, async sessions) race on that file; launch one at a time
+_DRIVER_LAUNCH_LOCK = threading.Lock()
+
+MAX_SCROLL_ATTEMPTS = 30  # Scrolls in a row that don't grow the page before a page is done
+MAX_SCROLL_ERRORS = 3  # Recoveries (pause, session check, reload) before giving up on a page
+
+
+def parse_trend_name(text):
+    """Pick the trend name out of a trend cell's text (e.g. '1 · Trending\\nOnana\\n12.3K posts')"""
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or '·' in line or line.startswith('Trending') or line.isdigit():
+            continue
+        if line.endswith(' posts') or line.endswith(' Tweets'):
+            continue
+        return line
+    return None
+
+
+def build_trend_list(texts, base_url=BASE_URL):
+    """Turn trend cell texts into a de-duplicated list of {'name', 'url'} dicts"""
+    trends = []
+    for text in texts:
+        name = parse_trend_name(text)
+        if name and name not in (t['name'] for t in trends):
+            trends.append({'name': name, 'url': base_url + SEARCH_PATH.format(query=quote(name))})
+    return trends
+
+
+class ScrollState:
+    """Progress through one page for TwitterScraper.scroll_step: tweets so far and the stop counters"""
+
+    def __init__(self, page_url, last_height, max_tweets=20, incremental=True, max_idle_scrolls=1, since_id=None):
+        self.page_url = page_url
+        self.last_height = last_height
+        self.max_tweets = max_tweets
+        self.incremental = incremental
+        self.max_idle_scrolls = max_idle_scrolls
+        self.since_id = since_id
+        self.tweets = []
+        self.processed_ids = set()  # Status ids already extracted from this page
+        self.processed_keys = set()  # Fallback for articles without a status permalink
+        self.idle_scrolls = 0
+        self.scroll_attempts = 0
+        self.errors = 0
+        self.stopped = False
+
+    @property
+    def finished(self):
+        return (self.stopped or len(self.tweets) >= self.max_tweets
+                or self.scroll_attempts >= MAX_SCROLL_ATTEMPTS)
+
+
 class TwitterScraper:
-    def __init__(self, username, password):
+    def __init__(self, username, password, sink=None, seen_index=None, profile_dir=None, cookies_path=None,
+                 driver=None, listeners=None, base_url=BASE_URL, metrics=None, checkpoint=None):
         self.username = username
         self.password = password
+        self.sink = sink or CSVSink()
+        self.seen_index = seen_index if seen_index is not None else SeenIndex()
+        self.profile_dir = profile_dir
+        self.listeners = list(listeners or [])  # Callables that receive each batch of newly saved tweets
+        self.base_url = base_url.rstrip('/')  # Point at a replay server to run offline
+        self.metrics = metrics or REGISTRY
+        self.current_trend = None  # Label for per-trend counters while a trend or profile is scraped
+        self.checkpoint = checkpoint  # Optional CrawlCheckpoint for resuming after a restart
+        self.requests = 0  # Page loads and scrolls issued so far, for request budgets
+        self.cookies_path = cookies_path or f"data/session/cookies_{username or 'default'}.json"
         self.driver = None
         self.wait = None
-        self.setup_driver()
+        self.pacer = None
+        if driver is not None:
+            # Use an already running WebDriver instead of launching Chrome
+            self.driver = driver
+            self.wait = WebDriverWait(self.driver, 20)
+            self.pacer = Pacer(self.driver, metrics=self.metrics)
+        else:
+            self.setup_driver()
         
     def setup_driver(self):
         """Set up the Chrome driver with options"""
@@ -47,25 +138,42 @@ class TwitterScraper:
             ]
             options.add_argument(f'user-agent={random.choice(user_agents)}')
             
-            # Initialize the undetected Chrome driver
-            self.driver = uc.Chrome(options=options)
+            # Initialize the undetected Chrome driver, reusing a saved browser profile if given
+            with _DRIVER_LAUNCH_LOCK:
+                if self.profile_dir:
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    self.driver = uc.Chrome(options=options, user_data_dir=os.path.abspath(self.profile_dir))
+                else:
+                    self.driver = uc.Chrome(options=options)
             self.wait = WebDriverWait(self.driver, 20)
+            self.pacer = Pacer(self.driver, metrics=self.metrics)
             logger.info("Chrome driver initialized successfully")
         except Exception as e:
             logger.error(f"Error setting up driver: {str(e)}")
             raise
         
+    def count_error(self, stage):
+        self.metrics.inc('scraper_errors_total', stage=stage, trend=self.current_trend or '')
+    
+    @timed('page_load')
+    def open_page(self, url):
+        """Navigate to url (timed as the page_load stage)"""
+        self.requests += 1
+        self.driver.get(url)
+    
+    @timed('random_sleep')
     def random_sleep(self, min_seconds=2, max_seconds=5):
         """Sleep for a random amount of time to appear more human-like"""
         time.sleep(random.uniform(min_seconds, max_seconds))
         
+    @timed('human_behavior')
     def simulate_human_behavior(self):
         """Simulate human-like behavior"""
         try:
             # Scroll randomly
             for _ in range(random.randint(1, 3)):
                 self.driver.execute_script(f"window.scrollBy(0, {random.randint(100, 300)});")
-                self.random_sleep(1, 2)
+                self.pacer.jitter()
                 
             # Move mouse randomly (simulated)
             self.driver.execute_script("""
@@ -81,352 +189,481 @@ class TwitterScraper:
         except Exception as e:
             logger.warning(f"Error in human behavior simulation: {str(e)}")
     
+    @timed('login')
     def login(self):
         """Login to Twitter"""
         try:
             logger.info("Attempting to login to Twitter...")
+            self.metrics.inc('scraper_logins_total')
             
             # Go to Twitter login page
-            self.driver.get("https://twitter.com/i/flow/login")
-            self.random_sleep(3, 5)
+            self.open_page(f"{self.base_url}/i/flow/login")
             
             # Wait for username field and enter username
-            username_field = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'input[autocomplete="username"]')))
+            username_field = self.pacer.wait_for(
+                'login_username', element_present('input[autocomplete="username"]'), raise_on_timeout=True
+            )
             username_field.send_keys(self.username)
-            self.random_sleep(1, 2)
+            self.pacer.jitter()
             
             # Click next button
             next_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//span[text()='Next']")))
             next_button.click()
-            self.random_sleep(2, 3)
+            
+            # Wait for whichever comes next: the verification prompt or the password field
+            verification_locator = (By.XPATH, "//*[contains(text(), 'unusual login activity')]")
+            self.pacer.wait_for('login_next_step', EC.any_of(
+                EC.presence_of_element_located(verification_locator),
+                element_present('input[type="password"]'),
+            ))
             
             # Check for verification after username
             try:
-                verification_text = self.wait.until(EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'unusual login activity')]")))
+                self.driver.find_element(*verification_locator)
                 logger.info("Verification required, entering phone number...")
                 
                 # Enter phone number with country code
                 phone_field = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="text"]')))
                 phone_field.send_keys("")  # Adding +1 for US country code
-                self.random_sleep(1, 2)
+                self.pacer.jitter()
                 
                 # Click next button
                 next_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//span[text()='Next']")))
                 next_button.click()
                 
-                # Wait for verification to complete
-                self.random_sleep(5, 7)
-                
             except Exception as e:
                 logger.info("No verification required or verification failed")
             
             # Wait for password field and enter password
-            password_field = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="password"]')))
+            password_field = self.pacer.wait_for(
+                'login_password', element_present('input[type="password"]'), raise_on_timeout=True
+            )
             password_field.send_keys(self.password)
-            self.random_sleep(1, 2)
+            self.pacer.jitter()
             
             # Click login button
             login_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//span[text()='Log in']")))
             login_button.click()
             
-            # Wait for login to complete
-            self.random_sleep(5, 7)
+            # Wait for login to complete, and for the session requests to settle before saving cookies
+            self.pacer.wait_for('login_redirect', EC.url_contains("home"))
+            self.pacer.wait_for_network_idle()
             
             # Check if login was successful
             if "home" in self.driver.current_url:
                 logger.info("Successfully logged in to Twitter")
+                self.save_cookies()
                 return True
             else:
                 logger.error("Login failed - not redirected to home page")
+                self.count_error('login')
                 return False
                 
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
+            self.count_error('login')
+            return False
+    
+    def save_cookies(self):
+        """Save the session cookies so later runs can skip the login flow"""
+        try:
+            directory = os.path.dirname(self.cookies_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.cookies_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.driver.get_cookies(), f)
+            os.replace(tmp_path, self.cookies_path)
+            logger.info(f"Saved session cookies to {self.cookies_path}")
+        except Exception as e:
+            logger.warning(f"Error saving cookies: {str(e)}")
+    
+    def load_cookies(self):
+        """Load saved session cookies into the browser; returns True if any were loaded"""
+        if not os.path.exists(self.cookies_path):
+            return False
+        try:
+            with open(self.cookies_path) as f:
+                cookies = json.load(f)
+            
+            # Cookies can only be set for the domain that is currently open
+            self.open_page(self.base_url)
+            for cookie in cookies:
+                cookie.pop('sameSite', None)
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception:
+                    pass
+            logger.info(f"Loaded {len(cookies)} session cookies from {self.cookies_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Error loading cookies: {str(e)}")
             return False
     
+    def read_trend_names(self):
+        """Return the text of every trend cell on the current page in one round-trip"""
+        return self.driver.execute_script(
+            "return Array.from(document.querySelectorAll('div[data-testid=\"trend\"]')).map(t => t.innerText);"
+        ) or []
+    
+    def is_alive(self):
+        """Check that the browser is still running and responding"""
+        try:
+            return self.driver is not None and self.driver.current_url is not None
+        except Exception:
+            return False
+    
+    def is_logged_in(self):
+        """Health check: open the home timeline and look for the logged-in navigation bar"""
+        try:
+            self.open_page(self.base_url + HOME_PATH)
+            if not self.pacer.wait_for('session_check', element_present('a[data-testid="AppTabBar_Home_Link"]'), timeout=10):
+                return False
+            return "login" not in self.driver.current_url
+        except Exception:
+            return False
+    
+    def page_logged_in(self):
+        """Check the page that is open for a session, without navigating away from it"""
+        try:
+            url = self.driver.current_url
+            if '/login' in url or '/i/flow' in url:
+                return False
+            return bool(self.driver.find_elements(By.CSS_SELECTOR, 'a[data-testid="AppTabBar_Home_Link"]'))
+        except Exception:
+            return False
+    
+    @timed('ensure_session')
+    def ensure_session(self):
+        """Make sure the browser has a valid session, only running login() if it doesn't"""
+        if self.is_logged_in():
+            logger.info("Existing session is still valid")
+            return True
+        if self.load_cookies() and self.is_logged_in():
+            logger.info("Restored session from saved cookies")
+            return True
+        return self.login()
+    
+    @timed('save')
     def save_tweets_to_csv(self, tweets, filename):
-        """Save tweets to CSV file"""
+        """Append tweets to the storage backend, skipping ones already stored"""
         try:
             if not tweets:  # Don't try to save if no tweets
                 return
-                
-            # Convert to DataFrame with explicit columns
-            new_tweets_df = pd.DataFrame(tweets, columns=[
-                'username', 'content', 'date', 'likes', 'retweets', 'replies', 'timestamp'
-            ])
             
-            # If file exists, append to it
-            if os.path.exists(filename):
+            # The sink buffers rows and dedups on (username, content) in memory,
+            # so this no longer re-reads and rewrites the whole day's file
+            saved = self.sink.write(tweets, filename)
+            fresh = [t for t in tweets if self.seen_index.add(*tweet_key(t))]
+            self.metrics.inc('scraper_tweets_saved_total', saved, trend=self.current_trend or '')
+            if len(tweets) > saved:
+                self.metrics.inc('scraper_duplicates_total', len(tweets) - saved, trend=self.current_trend or '')
+            logger.info(f"Successfully saved {saved} tweets to {filename}")
+            
+            # Hand newly collected tweets to streaming consumers (e.g. term counters)
+            for listener in self.listeners:
                 try:
-                    existing_df = pd.read_csv(filename)
-                    combined_df = pd.concat([existing_df, new_tweets_df], ignore_index=True)
+                    listener(fresh)
                 except Exception as e:
-                    logger.warning(f"Error reading existing CSV, creating new file: {str(e)}")
-                    combined_df = new_tweets_df
-            else:
-                combined_df = new_tweets_df
-            
-            # Remove duplicates based on content and username
-            combined_df = combined_df.drop_duplicates(subset=['content', 'username'])
-            
-            # Save to CSV
-            combined_df.to_csv(filename, index=False)
-            logger.info(f"Successfully saved {len(new_tweets_df)} tweets to {filename}")
+                    logger.warning(f"Error in tweet listener: {str(e)}")
             
         except Exception as e:
-            logger.error(f"Error saving tweets to CSV: {str(e)}")
-            # Print the tweets for debugging
-            logger.error(f"Tweets that failed to save: {tweets}")
+            # Only the count: dumping the batch floods the log on every failed save
+            logger.error("Error saving %d tweets to %s: %s", len(tweets), filename, e,
+                         extra={'event': 'save_failed', 'trend': self.current_trend, 'tweets': len(tweets)})
+            self.count_error('save')
 
-    def scroll_and_extract_tweets(self, max_tweets=20):
-        """Scroll through the page and extract tweets"""
-        tweets = []
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
-        max_scroll_attempts = 30  # Increased for more tweets
-        
-        while len(tweets) < max_tweets and scroll_attempts < max_scroll_attempts:
+    @timed('scroll_and_extract')
+    def scroll_and_extract_tweets(self, max_tweets=20, incremental=True, max_idle_scrolls=1, since_id=None):
+        """Scroll through the page and extract tweets.
+
+        In incremental mode, articles whose status id was already processed are
+        skipped on every later scroll, and scrolling stops once max_idle_scrolls
+        scrolls in a row turn up no new articles. Tweets with a status id at or
+        below since_id are skipped, and since timelines are newest first,
+        scrolling stops once the last article on the page is that old.
+        """
+        state = self.start_scroll(max_tweets, incremental, max_idle_scrolls, since_id)
+        while not state.finished:
             try:
-                # Wait for tweets to load
-                self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]')))
-                
-                # Get all tweet elements
-                tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]')
-                
-                for tweet in tweet_elements:
-                    if len(tweets) >= max_tweets:
-                        break
-                        
-                    try:
-                        # Extract tweet data using Selenium
-                        tweet_data = {
-                            'username': None,
-                            'content': None,
-                            'date': None,
-                            'likes': None,
-                            'retweets': None,
-                            'replies': None,
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        
-                        # Get username
-                        try:
-                            username_element = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="User-Name"]')
-                            tweet_data['username'] = username_element.text.split('\n')[0]
-                        except:
-                            pass
-                        
-                        # Get tweet content
-                        try:
-                            content_element = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetText"]')
-                            tweet_data['content'] = content_element.text
-                        except:
-                            pass
-                        
-                        # Get date
-                        try:
-                            date_element = tweet.find_element(By.TAG_NAME, 'time')
-                            tweet_data['date'] = date_element.get_attribute('datetime')
-                        except:
-                            pass
-                        
-                        # Get engagement metrics
-                        try:
-                            metrics = tweet.find_elements(By.CSS_SELECTOR, 'div[data-testid$="-count"]')
-                            for metric in metrics:
-                                metric_type = metric.get_attribute('data-testid')
-                                if 'like' in metric_type:
-                                    tweet_data['likes'] = metric.text
-                                elif 'retweet' in metric_type:
-                                    tweet_data['retweets'] = metric.text
-                                elif 'reply' in metric_type:
-                                    tweet_data['replies'] = metric.text
-                        except:
-                            pass
-                        
-                        # Only add tweet if it has content
-                        if tweet_data['content']:
-                            tweets.append(tweet_data)
-                            logger.info(f"Extracted tweet: {tweet_data['content'][:50]}...")
-                        
-                    except Exception as e:
-                        logger.warning(f"Error extracting tweet: {str(e)}")
-                        continue
-                
-                # Scroll down
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                self.random_sleep(2, 3)
-                
-                # Check if we've reached the bottom
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    scroll_attempts += 1
-                else:
-                    scroll_attempts = 0
-                last_height = new_height
-                
-                # Simulate human behavior
-                self.simulate_human_behavior()
-                
+                self.scroll_step(state)
+                if not state.stopped:
+                    self.simulate_human_behavior()
             except Exception as e:
-                logger.warning(f"Error during scrolling: {str(e)}")
+                if not self.scroll_error(state, e):
+                    break
                 # Pause for a longer time
                 logger.info("Pausing for 30 seconds before continuing...")
                 time.sleep(30)
-                
-                # Simulate human behavior again
                 self.simulate_human_behavior()
-                
-                # Try to relogin
-                try:
-                    if not self.login():
-                        logger.error("Failed to relogin after error")
-                        return tweets
-                except Exception as login_error:
-                    logger.error(f"Error during relogin: {str(login_error)}")
-                    return tweets
-                
-                continue
+                if not self.reopen_page(state):
+                    break
+        return state.tweets
+    
+    def start_scroll(self, max_tweets=20, incremental=True, max_idle_scrolls=1, since_id=None):
+        """Begin scrolling the current page; pass the returned ScrollState to scroll_step"""
+        return ScrollState(self.driver.current_url, self.driver.execute_script("return document.body.scrollHeight"),
+                           max_tweets, incremental, max_idle_scrolls, since_id)
+    
+    def scroll_step(self, state):
+        """Extract the tweets on the page, then scroll once and wait for more.
+
+        Shared by the blocking and the asyncio scroll loops: every browser call
+        of one iteration happens here, and the loops only add their own pauses.
+        Sets state.stopped when there is nothing more to read on the page, and
+        raises on errors, including a page that shows no tweets because the
+        session was lost.
+        """
+        # Wait for tweets to load; a page that shows none (e.g. an empty search) is done
+        try:
+            self.pacer.wait_for('tweets', element_present(TWEET_SELECTOR), raise_on_timeout=True)
+        except TimeoutException:
+            # A logged-out search page shows no tweets either; the caller recovers it
+            if not self.page_logged_in():
+                raise RuntimeError("Session lost, no tweets on the page")
+            logger.info("No tweets on the page, stopping")
+            state.stopped = True
+            return
+        
+        # Extract every tweet on the page in a single round-trip
+        with self.metrics.timer('scraper_stage_seconds', stage='extract'):
+            batch = extract_tweets(self.driver, skip_ids=state.processed_ids if state.incremental else None)
+        new_articles, caught_up = self._collect_batch(batch, state.tweets, state.max_tweets, state.processed_ids,
+                                                      state.processed_keys, state.incremental, state.since_id)
+        if caught_up:
+            logger.info("Reached tweets collected in an earlier run, stopping")
+            state.stopped = True
+            return
         
-        return tweets
+        # Stop once scrolling no longer brings in new articles
+        if state.incremental:
+            state.idle_scrolls = state.idle_scrolls + 1 if new_articles == 0 else 0
+            if state.idle_scrolls >= state.max_idle_scrolls:
+                logger.info("No new tweets after scrolling, stopping")
+                state.stopped = True
+                return
+        
+        # Scroll down and wait until new articles render or the page grows
+        article_count, _ = self.pacer.page_state()
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        self.requests += 1
+        self.pacer.wait_for_new_content(article_count, state.last_height)
+        
+        # Check if we've reached the bottom
+        new_height = self.driver.execute_script("return document.body.scrollHeight")
+        state.scroll_attempts = state.scroll_attempts + 1 if new_height == state.last_height else 0
+        state.last_height = new_height
     
+    def scroll_error(self, state, error):
+        """Count a failed scroll_step; returns False once the page should be given up on"""
+        logger.warning(f"Error during scrolling: {str(error)}")
+        self.count_error('scroll')
+        state.errors += 1
+        if state.errors >= MAX_SCROLL_ERRORS:
+            logger.error(f"Giving up on the page after {state.errors} errors")
+            return False
+        return True
+    
+    def reopen_page(self, state):
+        """Log in again if the session was lost and go back to the page being scrolled"""
+        try:
+            if not self.ensure_session():
+                logger.error("Failed to relogin after error")
+                return False
+            # The session check leaves the browser on the home timeline, so go back
+            self.open_page(state.page_url)
+            state.last_height = self.driver.execute_script("return document.body.scrollHeight")
+            return True
+        except Exception as e:
+            logger.error(f"Error reopening {state.page_url}: {str(e)}")
+            return False
+    
+    def _collect_batch(self, batch, tweets, max_tweets, processed_ids, processed_keys, incremental, since_id=None):
+        """Append the usable tweets from an extracted batch.
+
+        Returns (number of new articles, whether the batch reached tweets at or below since_id).
+        """
+        new_articles = 0
+        known_ids = [i for i in map(status_id_of, batch) if i is not None]
+        caught_up = since_id is not None and bool(known_ids) and known_ids[-1] <= since_id
+        for tweet_data in batch:
+            if len(tweets) >= max_tweets:
+                break
+            
+            if incremental:
+                if tweet_data['status_id']:
+                    processed_ids.add(tweet_data['status_id'])
+                else:
+                    key = tweet_key(tweet_data)
+                    if key in processed_keys:
+                        continue
+                    processed_keys.add(key)
+                new_articles += 1
+            
+            # Only add tweet if it has content and wasn't collected in an earlier run
+            if not tweet_data['content']:
+                continue
+            status_id = status_id_of(tweet_data)
+            if since_id is not None and status_id is not None and status_id <= since_id:
+                continue
+            if self.seen_index.seen(tweet_data):
+                self.metrics.inc('scraper_duplicates_total', trend=self.current_trend or '')
+                continue
+            tweets.append(tweet_data)
+            self.metrics.inc('scraper_tweets_extracted_total', trend=self.current_trend or '')
+            # Per-tweet detail is DEBUG and lazily formatted; scrape_trend logs one summary per trend
+            logger.debug("Extracted tweet: %.50s...", tweet_data['content'], extra={'event': 'tweet_extracted'})
+        return new_articles, caught_up
+    
+    @timed('user_tweets')
     def get_user_tweets(self, username, max_tweets=20):
         """Get the first 20 posts from a user's profile"""
         try:
             logger.info(f"Fetching posts from @{username}'s profile")
+            self.current_trend = f"@{username}"
             
             # Go to user's main profile
-            self.driver.get(f"https://twitter.com/{username}")
-            self.random_sleep(3, 5)
+            self.open_page(f"{self.base_url}/{username}")
+            self.pacer.jitter()
             
-            # Scroll and extract tweets
-            tweets = self.scroll_and_extract_tweets(max_tweets)
+            # Scroll and extract tweets, only newer than the last run if checkpointing
+            key = f"@{username}"
+            tweets = self.scroll_and_extract_tweets(max_tweets, since_id=self.since(key))
             
             if tweets:
                 # Save tweets immediately after getting them from this user
                 timestamp = datetime.now().strftime("%Y%m%d")
-                filename = f"data/raw/tweets_{timestamp}.csv"
+                filename = self.sink.path_for(timestamp)
                 self.save_tweets_to_csv(tweets, filename)
                 logger.info(f"Successfully fetched and saved {len(tweets)} tweets from @{username}")
             else:
                 logger.warning(f"No tweets collected from @{username}")
+            self.complete(key, tweets)
             
             return tweets
             
         except Exception as e:
             logger.error(f"Error fetching tweets for @{username}: {str(e)}")
+            self.count_error('user_tweets')
+            return []
+    
+    @timed('trend_list')
+    def get_trend_list(self):
+        """Load the trending page once and return the trends as a list of {'name', 'url'} dicts"""
+        try:
+            logger.info("Reading trending topics")
+            self.open_page(self.base_url + TRENDING_PATH)
+            self.pacer.wait_for('trends', element_present('div[data-testid="trend"]'), raise_on_timeout=True)
+            # The first trend cell renders before the rest of the list has loaded
+            self.pacer.wait_for_network_idle()
+            
+            trends = build_trend_list(self.read_trend_names(), self.base_url)
+            logger.info(f"Found {len(trends)} trending topics")
+            return trends
+            
+        except Exception as e:
+            logger.error(f"Error reading trending topics: {str(e)}")
+            self.count_error('trend_list')
             return []
     
+    @timed('scrape_trend')
+    def scrape_trend(self, trend, max_tweets=5, filename=None):
+        """Open a trend's live search results directly, scrape them and save the tweets"""
+        try:
+            started, duplicates = self.open_trend(trend)
+            # scroll_and_extract_tweets waits for the first article, so only a short pause here
+            self.pacer.jitter()
+            
+            tweets = self.scroll_and_extract_tweets(max_tweets, since_id=self.since(trend['name']))
+            self.finish_trend(trend, tweets, started, duplicates, filename)
+            return tweets
+            
+        except Exception as e:
+            logger.warning(f"Error scraping trend {trend['name']}: {str(e)}")
+            self.count_error('scrape_trend')
+            return []
+    
+    def open_trend(self, trend):
+        """Open a trend's search page; returns (start time, duplicates so far) for finish_trend"""
+        logger.info(f"Scraping trend: {trend['name']}")
+        self.current_trend = trend['name']
+        started, duplicates = time.monotonic(), self._duplicates()
+        self.open_page(trend['url'])
+        return started, duplicates
+    
+    def finish_trend(self, trend, tweets, started, duplicates, filename=None):
+        """Tag and save a trend's tweets, advance the checkpoint and log the trend summary"""
+        self._tag_trend(tweets, trend)
+        if tweets:
+            filename = filename or self.sink.path_for(datetime.now().strftime("%Y%m%d"))
+            self.save_tweets_to_csv(tweets, filename)
+        self.complete(trend['name'], tweets)
+        self.log_trend_summary(trend, tweets, started, duplicates)
+    
+    def complete(self, key, tweets):
+        """Move the checkpoint past a finished trend or '@user', once its tweets are on disk"""
+        if not self.checkpoint:
+            return
+        # The sink and seen index buffer writes; advancing since_id before they reach disk
+        # would lose those tweets for good if the process died in between
+        self.sink.flush()
+        self.seen_index.flush()
+        self.checkpoint.complete(key, tweets)
+    
+    def _duplicates(self):
+        return self.metrics.counter_value('scraper_duplicates_total', trend=self.current_trend or '')
+    
+    def log_trend_summary(self, trend, tweets, started, duplicates_before):
+        """One structured record per scraped trend, in place of a line per tweet"""
+        duplicates = self._duplicates() - duplicates_before
+        seconds = time.monotonic() - started
+        logger.info("Collected %d tweets for trend %s (%d duplicates, %.1fs)", len(tweets), trend['name'],
+                    duplicates, seconds,
+                    extra={'event': 'trend_summary', 'trend': trend['name'], 'tweets': len(tweets),
+                           'duplicates': duplicates, 'seconds': round(seconds, 2)})
+    
+    def since(self, key):
+        """Last status id collected for a trend or '@user' in an earlier run, if checkpointing"""
+        return self.checkpoint.since(key) if self.checkpoint else None
+    
+    @staticmethod
+    def _tag_trend(tweets, trend):
+        """Record which trend the tweets came from and default missing metrics to 0"""
+        for tweet_data in tweets:
+            tweet_data['trend'] = trend['name']
+            for metric in ('likes', 'retweets', 'replies'):
+                if tweet_data[metric] is None:
+                    tweet_data[metric] = 0
+    
+    @timed('trending_cycle')
     def get_trending_tweets(self, max_tweets_per_trend=5):
-        """Go to trending page, click each trend by index, wait, scroll and scrape, wait, go back, repeat for all trends."""
+        """Collect the trend list once, then visit each trend's live search URL directly and scrape it."""
         try:
             logger.info("Fetching tweets from trending topics (sequentially)")
-            self.driver.get("https://x.com/explore/tabs/trending")
-            self.random_sleep(5, 7)
-
-            tweets = []
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="trend"]')))
-            self.random_sleep(2, 3)
-            num_trends = len(self.driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="trend"]'))
-            logger.info(f"Found {num_trends} trending topics")
+            if self.checkpoint and self.checkpoint.in_progress:
+                # Pick up an interrupted cycle where it stopped instead of re-reading the trend list
+                trends = self.checkpoint.pending()
+                logger.info(f"Resuming cycle at trend {self.checkpoint.index + 1}/{len(self.checkpoint.trends)}")
+            else:
+                trends = self.get_trend_list()
+                if self.checkpoint:
+                    self.checkpoint.start_cycle(trends)
 
             # Prepare filename for saving
             timestamp = datetime.now().strftime("%Y%m%d")
-            filename = f"data/raw/tweets_{timestamp}.csv"
-
-            for i in range(num_trends):
-                try:
-                    self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="trend"]')))
-                    self.random_sleep(2, 3)
-                    trending_topics = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="trend"]')
-                    if i >= len(trending_topics):
-                        logger.info(f"Trend index {i} out of range after reload, stopping.")
-                        break
-                    topic = trending_topics[i]
-                    logger.info(f"Clicking on trending topic {i+1} (using ActionChains and JS click)")
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", topic)
-                    self.random_sleep(1, 2)
-                    try:
-                        ActionChains(self.driver).move_to_element(topic).pause(0.5).perform()
-                        self.random_sleep(0.5, 1)
-                        self.driver.execute_script("arguments[0].click();", topic)
-                    except Exception as click_e:
-                        logger.warning(f"ActionChains/JS click failed: {click_e}, trying normal click...")
-                        try:
-                            topic.click()
-                        except Exception as fallback_e:
-                            logger.error(f"Fallback click also failed: {fallback_e}")
-                            continue
-                    self.random_sleep(5, 8)
+            filename = self.sink.path_for(timestamp)
 
-                    num_scrolls = random.randint(1, 3)
-                    for _ in range(num_scrolls):
-                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        self.random_sleep(2, 4)
-                        self.simulate_human_behavior()
-
-                    self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]')))
-                    self.random_sleep(2, 3)
-                    tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]')[:max_tweets_per_trend]
-                    logger.info(f"Found {len(tweet_elements)} tweets in current topic")
-
-                    for tweet in tweet_elements:
-                        try:
-                            tweet_data = {
-                                'username': None,
-                                'content': None,
-                                'date': None,
-                                'likes': 0,
-                                'retweets': 0,
-                                'replies': 0,
-                                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            try:
-                                username_element = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="User-Name"]')
-                                tweet_data['username'] = username_element.text.split('\n')[0]
-                            except:
-                                pass
-                            try:
-                                content_element = tweet.find_element(By.CSS_SELECTOR, 'div[data-testid="tweetText"]')
-                                tweet_data['content'] = content_element.text
-                            except:
-                                continue
-                            try:
-                                date_element = tweet.find_element(By.TAG_NAME, 'time')
-                                tweet_data['date'] = date_element.get_attribute('datetime')
-                            except:
-                                pass
-                            try:
-                                metrics = tweet.find_elements(By.CSS_SELECTOR, 'div[data-testid$="-count"]')
-                                for metric in metrics:
-                                    metric_type = metric.get_attribute('data-testid')
-                                    if 'like' in metric_type:
-                                        tweet_data['likes'] = metric.text
-                                    elif 'retweet' in metric_type:
-                                        tweet_data['retweets'] = metric.text
-                                    elif 'reply' in metric_type:
-                                        tweet_data['replies'] = metric.text
-                            except:
-                                pass
-                            if tweet_data['content']:
-                                tweets.append(tweet_data)
-                                logger.info(f"Extracted tweet: {tweet_data['content'][:50]}...")
-                                # Save this tweet immediately
-                                self.save_tweets_to_csv([tweet_data], filename)
-                        except Exception as e:
-                            logger.warning(f"Error extracting tweet: {str(e)}")
-                            continue
-
-                    self.random_sleep(5, 10)
-                    logger.info("Returning to trending page...")
-                    self.driver.get("https://x.com/explore/tabs/trending")
-                    self.random_sleep(5, 8)
-                except Exception as e:
-                    logger.warning(f"Error processing trending topic {i+1}: {str(e)}")
-                    self.driver.get("https://x.com/explore/tabs/trending")
-                    self.random_sleep(5, 8)
-                    continue
+            tweets = []
+            for i, trend in enumerate(trends):
+                logger.info(f"Trending topic {i+1}/{len(trends)}: {trend['name']}")
+                tweets.extend(self.scrape_trend(trend, max_tweets_per_trend, filename))
+                self.pacer.jitter()
 
+            self.sink.flush(filename)
+            self.seen_index.flush()
+            if self.checkpoint:
+                self.checkpoint.finish_cycle()
+            self.pacer.log_summary()
             if tweets:
                 logger.info(f"Successfully fetched and saved {len(tweets)} tweets from trending topics")
             else:
@@ -434,10 +671,16 @@ class TwitterScraper:
             return tweets
         except Exception as e:
             logger.error(f"Error fetching trending tweets: {str(e)}")
+            self.count_error('trending_cycle')
             return []
     
     def close(self):
-        """Close the browser"""
+        """Flush pending tweets and close the browser"""
+        try:
+            self.sink.close()
+            self.seen_index.close()
+        except Exception as e:
+            logger.error(f"Error flushing tweets: {str(e)}")
         try:
             if self.driver:
                 self.driver.quit()
@@ -451,10 +694,12 @@ def signal_handler(signum, frame):
     logger.info("Received termination signal. Cleaning up...")
     if scraper:
         scraper.close()
+    if metrics_writer:
+        metrics_writer.stop()
     sys.exit(0)
 
 def main():
-    global scraper
+    global scraper, metrics_writer
     
     # Set up signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -463,57 +708,64 @@ def main():
     # Create data directory if it doesn't exist
     os.makedirs("data/raw", exist_ok=True)
     
+    # Console output plus JSON lines in data/logs, formatted and written off the scraping thread
+    configure_logging("data/logs/scraper.jsonl")
+    
+    # Periodically dump stage timings and counters for regression tracking
+    metrics_writer = MetricsFileWriter("data/metrics/scraper.json").start()
+    
+    # Survives browser restarts, so a crashed cycle resumes at the trend it was on
+    checkpoint = CrawlCheckpoint("data/session/checkpoint.json")
+    
+    # Chooses the next trend and fetch depth within the request rate of the old fixed 300 s cycle,
+    # keeping its trend estimates in the checkpoint so a restart picks up where it left off
+    scheduler = AdaptiveScheduler(checkpoint=checkpoint)
+    
     while True:
         try:
-            # Initialize scraper with your credentials
-            scraper = TwitterScraper(
-                username="",
-                password=""
-            )
+            # Keep one long-lived browser across cycles, only restarting it if it died
+            restarted = scraper is None or not scraper.is_alive()
+            if restarted:
+                if scraper:
+                    scraper.close()
+                # Initialize scraper with your credentials
+                scraper = TwitterScraper(
+                    username="",
+                    password="",
+                    profile_dir="data/session/profile",
+                    checkpoint=checkpoint
+                )
             
-            # Login to Twitter
-            if not scraper.login():
+            # Reuse the saved session, logging in only if it is no longer valid; checked for a
+            # new browser and whenever the trend list is re-read rather than before every visit
+            if (restarted or scheduler.trends_due()) and not scraper.ensure_session():
                 logger.error("Failed to login. Retrying in 60 seconds...")
                 time.sleep(60)
                 continue
             
             try:
-                # Get tweets from trending topics
-                tweets = scraper.get_trending_tweets(max_tweets_per_trend=5)
-                
-                if tweets:
-                    logger.info(f"Successfully collected {len(tweets)} tweets from trending topics")
+                # Visit whichever trend is expected to yield the most fresh tweets per browser second
+                wait = scheduler.step(scraper)
+                if wait:
+                    logger.info(f"Nothing worth fetching yet. Waiting {wait:.0f} seconds...")
+                    time.sleep(wait)
                 else:
-                    logger.warning("No tweets collected, will retry after relogin")
-                
-                # Add a delay before next cycle
-                delay = random.uniform(10, 15)
-                logger.info(f"Waiting {delay:.1f} seconds before next cycle...")
-                time.sleep(delay)
+                    scraper.pacer.jitter()
                 
             except Exception as e:
                 logger.error(f"Error processing trending topics: {str(e)}")
-                # If error occurs, try to relogin and retry
-                logger.info("Attempting to relogin and retry...")
-                if scraper.login():
-                    logger.info("Successfully relogged in, will retry")
-                else:
-                    logger.error("Failed to relogin, waiting 60 seconds before retry...")
-                    time.sleep(60)
+                # The session is checked (and renewed if needed) at the top of the loop
                 continue
             
-            # Close the browser and wait before starting again
-            scraper.close()
-            logger.info("Completed one cycle. Waiting 300 seconds before starting next cycle...")
-            time.sleep(300)
-            
         except Exception as e:
             logger.error(f"Error in main loop: {str(e)}")
             if scraper:
                 scraper.close()
+                scraper = None
             logger.info("Waiting 60 seconds before retrying...")
             time.sleep(60)
 
 if __name__ == "__main__":
     scraper = None
+    metrics_writer = None
     main()